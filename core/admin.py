@@ -1,6 +1,8 @@
 from django.contrib import admin
+from django.db import transaction
 from django.utils import timezone
-from .models import AdminProfile, ClientProfile, AgentProfile, Transaction, AgentRequest, AgentApplication, AccountVerification
+from .console_counters import increment
+from .models import AdminProfile, ClientProfile, AgentProfile, Transaction, AgentRequest, AgentApplication, AccountVerification, SmsDeliveryReport
 
 
 @admin.register(AdminProfile)
@@ -14,6 +16,7 @@ class ClientProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'first_name', 'last_name', 'email', 'phone_number', 'verification_status', 'created_at')
     search_fields = ('first_name', 'last_name', 'email', 'phone_number', 'user__username')
     list_filter = ('created_at', 'user__accountverification__limits_unlocked')
+    list_select_related = ('user__accountverification',)
 
     def verification_status(self, obj):
         verification = getattr(obj.user, 'accountverification', None)
@@ -55,6 +58,7 @@ class TransactionAdmin(admin.ModelAdmin):
 class AgentRequestAdmin(admin.ModelAdmin):
     list_display = ('transaction', 'requested_at', 'expires_at', 'is_accepted', 'is_expired')
     list_filter = ('is_accepted', 'is_expired', 'requested_at')
+    list_select_related = ('transaction__client',)
 
 
 @admin.register(AgentApplication)
@@ -65,12 +69,20 @@ class AgentApplicationAdmin(admin.ModelAdmin):
     readonly_fields = ('submitted_at', 'reviewed_at', 'reviewed_by')
     actions = ['mark_verified', 'mark_cancelled']
 
+    def _set_status(self, request, queryset, status):
+        with transaction.atomic():
+            # Bulk UPDATE skips model signals, so adjust the pending counter here
+            leaving_pending = queryset.filter(status=AgentApplication.STATUS_PENDING).count()
+            updated = queryset.update(status=status, reviewed_by=request.user, reviewed_at=timezone.now())
+            increment('pending_applications', -leaving_pending)
+        return updated
+
     def mark_verified(self, request, queryset):
-        updated = queryset.update(status=AgentApplication.STATUS_VERIFIED, reviewed_by=request.user, reviewed_at=timezone.now())
+        updated = self._set_status(request, queryset, AgentApplication.STATUS_VERIFIED)
         self.message_user(request, f"{updated} application(s) marked as verified")
 
     def mark_cancelled(self, request, queryset):
-        updated = queryset.update(status=AgentApplication.STATUS_CANCELLED, reviewed_by=request.user, reviewed_at=timezone.now())
+        updated = self._set_status(request, queryset, AgentApplication.STATUS_CANCELLED)
         self.message_user(request, f"{updated} application(s) marked as cancelled")
 
     mark_verified.short_description = 'Mark selected applications as verified'
@@ -91,3 +103,13 @@ class AccountVerificationAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__email')
     readonly_fields = ('completion_score', 'limits_unlocked', 'created_at', 'updated_at')
     ordering = ('-updated_at',)
+
+
+@admin.register(SmsDeliveryReport)
+class SmsDeliveryReportAdmin(admin.ModelAdmin):
+    list_display = ('message_id', 'phone_number', 'status', 'failure_reason', 'network_code', 'received_at')
+    list_filter = ('status',)
+    # Exact matches only, so searches stay on the message id and phone indexes
+    search_fields = ('=message_id', '=phone_number')
+    date_hierarchy = 'received_at'
+    ordering = ('-received_at',)
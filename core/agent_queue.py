@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from django.db.models import Q
+
+from .models import AgentRequest, Transaction
+from .utils.cursors import decode_cursor, encode_cursor
+
+QUEUE_PAGE_SIZE = 20
+ACTIVE_TRANSACTIONS_LIMIT = 50
+ACTIVE_STATUSES = ['agent_online', 'address_provided', 'crypto_received']
+
+# Columns the portal and the JSON feed read; everything else stays in the database
+QUEUE_FIELDS = (
+    'id', 'requested_at', 'expires_at', 'is_accepted', 'is_expired', 'offer_expires_at',
+    'transaction', 'transaction__id', 'transaction__platform', 'transaction__currency', 'transaction__amount',
+    'transaction__client',
+    'transaction__client__first_name', 'transaction__client__last_name', 'transaction__client__phone_number',
+)
+TRANSACTION_ROW_FIELDS = (
+    'id', 'created_at', 'platform', 'currency', 'amount', 'amount_to_receive', 'status',
+    'client', 'client__first_name', 'client__last_name', 'client__phone_number',
+)
+
+
+@dataclass
+class QueuePage:
+    items: List[AgentRequest]
+    next_cursor: Optional[str]
+
+
+def open_requests(agent=None):
+    """Open requests, limited to those offered to ``agent`` or open to every agent when given."""
+    qs = AgentRequest.objects.filter(is_accepted=False, is_expired=False)
+    if agent is not None:
+        qs = qs.filter(Q(offered_to=agent) | Q(offered_to__isnull=True))
+    return qs
+
+
+def pending_request_page(*, agent=None, after=None, limit=QUEUE_PAGE_SIZE):
+    """Open requests oldest first, keyset-paginated on (requested_at, id) with client data joined."""
+    qs = (
+        open_requests(agent)
+        .select_related('transaction__client')
+        .only(*QUEUE_FIELDS)
+        .order_by('requested_at', 'id')
+    )
+    position = decode_cursor(after)
+    if position:
+        requested_at, pk = position
+        qs = qs.filter(Q(requested_at__gt=requested_at) | Q(requested_at=requested_at, id__gt=pk))
+    rows = list(qs[:limit + 1])
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].requested_at, items[-1].pk) if len(rows) > limit else None
+    return QueuePage(items=items, next_cursor=next_cursor)
+
+
+def pending_request_count(agent=None):
+    return open_requests(agent).count()
+
+
+def agent_transactions(agent, statuses, limit):
+    return (
+        Transaction.objects.filter(agent=agent, status__in=statuses)
+        .select_related('client')
+        .only(*TRANSACTION_ROW_FIELDS)
+        .order_by('-created_at')[:limit]
+    )
+
+
+def serialize_queue_item(agent_request):
+    transaction = agent_request.transaction
+    return {
+        'id': agent_request.id,
+        'transaction_id': transaction.id,
+        'client': str(transaction.client),
+        'platform': transaction.get_platform_display(),
+        'amount': str(transaction.amount),
+        'currency': transaction.get_currency_display(),
+        'requested_at': agent_request.requested_at.isoformat(),
+        'expires_at': agent_request.expires_at.isoformat(),
+        'offer_expires_at': agent_request.offer_expires_at.isoformat() if agent_request.offer_expires_at else None,
+    }
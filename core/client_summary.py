@@ -0,0 +1,141 @@
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import List, Optional
+
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Greatest
+
+from .models import ClientTransactionSummary, Transaction
+from .utils.cursors import decode_cursor, encode_cursor
+
+HISTORY_PAGE_SIZE = 20
+HISTORY_FIELDS = ('id', 'client', 'created_at', 'platform', 'currency', 'amount', 'amount_to_receive', 'status')
+
+_STATE_FIELDS = ('client_id', 'status', 'amount', 'amount_to_receive', 'currency')
+
+
+def transaction_state(transaction):
+    """Fields the summary depends on, read without triggering deferred-field queries."""
+    values = transaction.__dict__
+    if any(field not in values for field in _STATE_FIELDS):
+        return None
+    return tuple(values[field] for field in _STATE_FIELDS)
+
+
+def _contribution(status, amount, amount_to_receive, currency, count=1):
+    settled = status in ClientTransactionSummary.SETTLED_STATUSES
+    return {
+        'total_count': count,
+        f'{status}_count': count,
+        'volume_usdt': (amount or Decimal('0')) if settled and currency == 'usdt' else Decimal('0'),
+        'volume_ksh': (amount_to_receive or Decimal('0')) if settled else Decimal('0'),
+    }
+
+
+def _adjusted(field, value):
+    if value > 0:
+        return F(field) + value
+    # Clamp at zero: a summary that drifted must not make the UPDATE violate the unsigned column
+    return Greatest(F(field) + value, 0, output_field=ClientTransactionSummary._meta.get_field(field))
+
+
+def _apply(client_id, delta):
+    delta = {field: value for field, value in delta.items() if value}
+    if not delta:
+        return
+    updated = ClientTransactionSummary.objects.filter(client_id=client_id).update(
+        **{field: _adjusted(field, value) for field, value in delta.items()}
+    )
+    if not updated:
+        # First write for this client: build the row from history, which already includes this change
+        rebuild_client_summary(client_id)
+
+
+def _merge(target, contribution, sign):
+    for field, value in contribution.items():
+        target[field] += sign * value
+
+
+def apply_transaction_change(old_state, new_state):
+    """Move one transaction's contribution from old_state to new_state (either may be None)."""
+    deltas = defaultdict(lambda: defaultdict(int))
+    if old_state is not None:
+        client_id, *values = old_state
+        _merge(deltas[client_id], _contribution(*values), -1)
+    if new_state is not None:
+        client_id, *values = new_state
+        _merge(deltas[client_id], _contribution(*values), 1)
+    for client_id, delta in deltas.items():
+        _apply(client_id, delta)
+
+
+def bulk_update_status(transactions, new_status, **fields):
+    """Set-based status UPDATE that keeps the client summaries in step; returns the rows updated.
+
+    Old statuses are grouped before the UPDATE and the deltas applied after it, so a summary
+    rebuilt from history on its first write already sees the new status.
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    groups = list(
+        transactions.exclude(status=new_status)
+        .values('client_id', 'status', 'currency')
+        .annotate(n=Count('id'), amount_sum=Sum('amount'), ksh_sum=Sum('amount_to_receive'))
+    )
+    updated = transactions.update(status=new_status, **fields)
+    for group in groups:
+        old = _contribution(group['status'], group['amount_sum'], group['ksh_sum'], group['currency'], group['n'])
+        new = _contribution(new_status, group['amount_sum'], group['ksh_sum'], group['currency'], group['n'])
+        _merge(deltas[group['client_id']], old, -1)
+        _merge(deltas[group['client_id']], new, 1)
+    for client_id, delta in deltas.items():
+        _apply(client_id, delta)
+    return updated
+
+
+def rebuild_client_summary(client_id):
+    """Recompute a client's summary from its full history."""
+    settled = Q(status__in=ClientTransactionSummary.SETTLED_STATUSES)
+    aggregates = Transaction.objects.filter(client_id=client_id).aggregate(
+        total_count=Count('id'),
+        volume_usdt=Sum('amount', filter=settled & Q(currency='usdt')),
+        volume_ksh=Sum('amount_to_receive', filter=settled),
+        **{
+            f'{status}_count': Count('id', filter=Q(status=status))
+            for status, _ in Transaction.STATUS_CHOICES
+        },
+    )
+    aggregates['volume_usdt'] = aggregates['volume_usdt'] or Decimal('0')
+    aggregates['volume_ksh'] = aggregates['volume_ksh'] or Decimal('0')
+    summary, _ = ClientTransactionSummary.objects.update_or_create(client_id=client_id, defaults=aggregates)
+    return summary
+
+
+def get_client_summary(client):
+    try:
+        return ClientTransactionSummary.objects.get(client=client)
+    except ClientTransactionSummary.DoesNotExist:
+        return rebuild_client_summary(client.pk)
+
+
+@dataclass
+class HistoryPage:
+    items: List[Transaction]
+    next_cursor: Optional[str]
+
+
+def client_history_page(client, *, before=None, limit=HISTORY_PAGE_SIZE):
+    """A client's transactions newest first, keyset-paginated on (created_at, id)."""
+    qs = (
+        Transaction.objects.filter(client=client)
+        .only(*HISTORY_FIELDS)
+        .order_by('-created_at', '-id')
+    )
+    position = decode_cursor(before)
+    if position:
+        created_at, pk = position
+        qs = qs.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk))
+    rows = list(qs[:limit + 1])
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].pk) if len(rows) > limit else None
+    return HistoryPage(items=items, next_cursor=next_cursor)
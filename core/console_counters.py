@@ -0,0 +1,82 @@
+import logging
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import AccountVerification, AgentApplication, AgentProfile, ClientProfile, ConsoleCounter, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Counter name -> the rows it counts; reconcile_counters() recomputes each one from here
+COUNTERS = {
+    'clients': lambda: ClientProfile.objects.all(),
+    'agents': lambda: AgentProfile.objects.all(),
+    'transactions': lambda: Transaction.objects.all(),
+    'verified_accounts': lambda: AccountVerification.objects.filter(limits_unlocked=True),
+    'unverified_accounts': lambda: AccountVerification.objects.filter(limits_unlocked=False),
+    'pending_applications': lambda: AgentApplication.objects.filter(status=AgentApplication.STATUS_PENDING),
+}
+
+# Models whose counter is a plain row count, adjusted on create and delete
+ROW_COUNTERS = {
+    ClientProfile: 'clients',
+    AgentProfile: 'agents',
+    Transaction: 'transactions',
+}
+
+VERIFICATION_COUNTERS = ('verified_accounts', 'unverified_accounts')
+
+
+def verification_counter(limits_unlocked):
+    return 'verified_accounts' if limits_unlocked else 'unverified_accounts'
+
+
+def increment(name, delta=1):
+    """Adjust a counter inside the caller's transaction, so a rollback undoes it too."""
+    if not delta:
+        return
+    updated = ConsoleCounter.objects.filter(name=name).update(value=F('value') + delta, updated_at=timezone.now())
+    if not updated:
+        # First write for this counter: count from scratch, which already includes this change
+        reconcile_counters([name])
+
+
+def move(old_name, new_name, count=1):
+    if old_name != new_name:
+        increment(old_name, -count)
+        increment(new_name, count)
+
+
+def reconcile_counters(names=None):
+    """Recount each counter from its table and overwrite any drift. Returns {name: correction}.
+
+    Each counter is locked before it is counted: a writer that commits first is in both the count
+    and the stored value, and one still in flight blocks on the lock and applies its delta afterwards.
+    """
+    corrections = {}
+    for name in names or COUNTERS:
+        with transaction.atomic():
+            counter, created = ConsoleCounter.objects.select_for_update().get_or_create(name=name)
+            actual = COUNTERS[name]().count()
+            if actual != counter.value:
+                ConsoleCounter.objects.filter(name=name).update(value=actual, updated_at=timezone.now())
+                if not created:
+                    corrections[name] = actual - counter.value
+    if corrections:
+        logger.warning('Console counters drifted and were corrected: %s', corrections)
+    return corrections
+
+
+def read_counters():
+    """Every console counter in one primary-key scan, creating any that are missing."""
+    values = dict(ConsoleCounter.objects.filter(name__in=COUNTERS).values_list('name', 'value'))
+    missing = [name for name in COUNTERS if name not in values]
+    if missing:
+        reconcile_counters(missing)
+        values.update(ConsoleCounter.objects.filter(name__in=missing).values_list('name', 'value'))
+    return values
+
+
+def verification_summary(counters):
+    return {'verified': counters['verified_accounts'], 'pending': counters['unverified_accounts']}
@@ -1,58 +1,67 @@
 # core/context_processors.py
-from .models import PricingSettings
+# Values are wrapped in SimpleLazyObject so pages that never read them run no queries.
 from django.utils import timezone
-from .models import AccountVerification
+from django.utils.functional import SimpleLazyObject
+from .utils.pricing import get_pricing
+from .utils.verification import get_account_verification
 
 
 def dust2cash_settings(request):
-    pricing = PricingSettings.get_solo()
-    return {
-        'settings': {
-            'buying_rate_per_usdt': float(pricing.exchange_rate),
-            'transaction_fee_percent': float(pricing.transaction_fee_percent),
+    def build_settings():
+        pricing = get_pricing()
+        return {
+            # Exact Decimals for display only; payout figures come from the quote endpoint
+            'buying_rate_per_usdt': pricing.exchange_rate,
+            'transaction_fee_percent': pricing.transaction_fee_percent,
             'min_trade_amount_usdt': 5.00,
-        },
+        }
+
+    return {
+        'settings': SimpleLazyObject(build_settings),
         'now': {
             'year': timezone.now().year if hasattr(timezone, 'now') else 2025
         }
     }
 
 def user_portal(request):
-    dashboard_url = None
-    role = 'guest'
-
-    if request.user.is_authenticated:
-        if request.user.is_staff:
-            dashboard_url = 'admin_dashboard'
-            role = 'admin'
-        else:
-            try:
-                if request.user.agent_profile:
-                    dashboard_url = 'agent_portal'
-                    role = 'agent'
-            except Exception:
+    def build_portal():
+        dashboard_url = None
+        role = 'guest'
+
+        if request.user.is_authenticated:
+            if request.user.is_staff:
+                dashboard_url = 'admin_dashboard'
+                role = 'admin'
+            else:
                 try:
-                    if request.user.client_profile:
-                        dashboard_url = 'client_dashboard'
-                        role = 'client'
+                    if request.user.agent_profile:
+                        dashboard_url = 'agent_portal'
+                        role = 'agent'
                 except Exception:
-                    role = 'user'
+                    try:
+                        if request.user.client_profile:
+                            dashboard_url = 'client_dashboard'
+                            role = 'client'
+                    except Exception:
+                        role = 'user'
 
-    return {
-        'user_portal': {
+        return {
             'dashboard_url': dashboard_url,
             'role': role,
         }
+
+    return {
+        'user_portal': SimpleLazyObject(build_portal),
     }
 
 def inject_agent_details(request):
-    pricing = PricingSettings.objects.first()
-    agent_profile = getattr(request.user, 'agent_profile', None) if request.user.is_authenticated else None
-    verification = None
-    if request.user.is_authenticated:
-        verification, _ = AccountVerification.objects.get_or_create(user=request.user)
+    def load_agent_profile():
+        if not request.user.is_authenticated:
+            return None
+        return getattr(request.user, 'agent_profile', None)
+
     return {
-        'pricing': pricing,
-        'agent': agent_profile,
-        'account_verification': verification,
+        'pricing': SimpleLazyObject(get_pricing),
+        'agent': SimpleLazyObject(load_agent_profile),
+        'account_verification': SimpleLazyObject(lambda: get_account_verification(request)),
     }
@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from .agent_queue import ACTIVE_STATUSES
+from .events import publish_queue_change
+from .models import AgentRequest
+from .presence import online_agents
+
+OPEN = Q(is_accepted=False, is_expired=False)
+
+
+def offer_timeout():
+    return timedelta(seconds=getattr(settings, 'AGENT_OFFER_TIMEOUT_SECONDS', 60))
+
+
+def ranked_online_agents(exclude=()):
+    """Online agents, least loaded first: load is the number of transactions they are actively handling."""
+    return (
+        online_agents()
+        .exclude(pk__in=exclude)
+        .annotate(open_load=Count('transactions', filter=Q(transactions__status__in=ACTIVE_STATUSES)))
+        .order_by('open_load', 'pk')
+    )
+
+
+def offer_next(agent_request_id, *, expected_holder=None, expected_expiry=None):
+    """Pass the offer from ``expected_holder`` to the least-loaded agent who has not had it yet.
+
+    The move is a conditional UPDATE on the current holder, and on the offer's expiry when
+    ``expected_expiry`` is given, so a concurrent claim, a duplicate escalation or one left over
+    from an earlier round of offers makes this a no-op. Once every online agent has passed, the
+    request is opened to all. Returns the new holder, or None.
+    """
+    tried = AgentRequest.offered_agents.through.objects.filter(
+        agentrequest_id=agent_request_id
+    ).values_list('agentprofile_id', flat=True)
+    agent = ranked_online_agents(exclude=tried).first()
+    offer_expires_at = timezone.now() + offer_timeout() if agent else None
+    current = AgentRequest.objects.filter(OPEN, pk=agent_request_id, offered_to=expected_holder)
+    if expected_expiry is not None:
+        current = current.filter(offer_expires_at=expected_expiry)
+    moved = current.update(
+        offered_to=agent, offer_expires_at=offer_expires_at,
+    )
+    if not moved or (agent is None and expected_holder is None):
+        return None
+    publish_queue_change(agent_request_id, 'offered')
+
+    from .tasks import escalate_agent_offer, notify_agents_of_request_task
+
+    transaction_id, expires_at = AgentRequest.objects.filter(pk=agent_request_id).values_list(
+        'transaction_id', 'expires_at',
+    ).get()
+    if agent is None:
+        # Every online agent let their turn lapse: alert them all that it is now first come, first served
+        respond_by = expires_at.isoformat()
+        db_transaction.on_commit(lambda: notify_agents_of_request_task.delay(transaction_id, None, respond_by))
+        return None
+
+    AgentRequest.offered_agents.through.objects.create(agentrequest_id=agent_request_id, agentprofile_id=agent.pk)
+    agent_id = agent.pk
+    db_transaction.on_commit(lambda: escalate_agent_offer.apply_async(
+        args=[agent_request_id, agent_id, offer_expires_at.isoformat()], eta=offer_expires_at,
+    ))
+    respond_by = offer_expires_at.isoformat()
+    db_transaction.on_commit(lambda: notify_agents_of_request_task.delay(transaction_id, [agent_id], respond_by))
+    return agent
+
+
+def dispatch_agent_request(agent_request):
+    """Start offering a new or renewed request, forgetting any earlier round of offers."""
+    agent_request.offered_agents.clear()
+    return offer_next(agent_request.pk)
+
+
+def claim_request(agent_request_id, agent):
+    """Accept a request for ``agent`` with one conditional UPDATE; exactly one concurrent caller wins.
+
+    An agent may claim a request offered to them, including one whose offer window has just run
+    out but has not been passed on yet, or one that is open to everyone.
+    """
+    claimed = AgentRequest.objects.filter(
+        OPEN,
+        Q(offered_to=agent) | Q(offered_to__isnull=True),
+        pk=agent_request_id,
+        expires_at__gt=timezone.now(),
+    ).update(is_accepted=True, offered_to=agent, offer_expires_at=None)
+    if claimed:
+        publish_queue_change(agent_request_id, 'closed')
+    return bool(claimed)
@@ -0,0 +1,97 @@
+import asyncio
+import json
+import logging
+import time
+
+import redis.asyncio as aioredis
+from django.conf import settings
+from django.db import transaction
+
+from .utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+AGENT_CHANNEL = 'events:agents'
+AVAILABILITY_CHANNEL = 'events:availability'
+
+# Comment lines keep proxies from closing idle streams
+SSE_KEEPALIVE_SECONDS = 15
+# Streams end after this long and EventSource reconnects, re-checking the session on the way
+SSE_MAX_AGE_SECONDS = 300
+SSE_RETRY_MS = 3000
+
+def client_channel(client_id):
+    return f'events:client:{client_id}'
+
+
+def events_enabled():
+    return bool(getattr(settings, 'REDIS_URL', None))
+
+
+def _publish_now(channel, event, data):
+    try:
+        get_redis().publish(channel, json.dumps({'event': event, 'data': data}, default=str))
+    except Exception:
+        logger.exception('Failed to publish %s event on %s', event, channel)
+
+
+def publish(channel, event, data):
+    """Publish once the surrounding transaction commits, so subscribers never read stale rows."""
+    if not events_enabled():
+        return
+    transaction.on_commit(lambda: _publish_now(channel, event, data))
+
+
+def publish_transaction_status(transaction_id, client_id, status, status_display):
+    publish(client_channel(client_id), 'status', {
+        'transaction_id': transaction_id,
+        'status': status,
+        'status_display': status_display,
+    })
+
+
+def publish_queue_change(agent_request_id, state):
+    """Tell agent portals a request was opened or closed; they re-fetch the queue themselves."""
+    publish(AGENT_CHANNEL, 'queue', {'request_id': agent_request_id, 'state': state})
+
+
+def publish_agent_availability(agent_online):
+    publish(AVAILABILITY_CHANNEL, 'availability', {'agent_online': agent_online})
+
+
+def _format_sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data)}\n\n'
+
+
+async def event_stream(channels):
+    """Relay Redis pub/sub messages on ``channels`` as an SSE byte stream."""
+    client = aioredis.Redis.from_url(settings.REDIS_URL)
+    pubsub = client.pubsub(ignore_subscribe_messages=True)
+    try:
+        await pubsub.subscribe(*channels)
+        yield f'retry: {SSE_RETRY_MS}\n\n'
+        deadline = time.monotonic() + SSE_MAX_AGE_SECONDS
+        last_sent = time.monotonic()
+        while time.monotonic() < deadline:
+            message = await pubsub.get_message(timeout=1.0)
+            if message is None:
+                if time.monotonic() - last_sent >= SSE_KEEPALIVE_SECONDS:
+                    last_sent = time.monotonic()
+                    yield ': keepalive\n\n'
+                continue
+            try:
+                payload = json.loads(message['data'])
+            except (TypeError, ValueError):
+                continue
+            last_sent = time.monotonic()
+            yield _format_sse(payload['event'], payload['data'])
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception('Event stream for %s failed', channels)
+    finally:
+        try:
+            await pubsub.aclose()
+            await client.aclose()
+        except Exception:
+            logger.debug('Error closing event stream', exc_info=True)
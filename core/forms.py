@@ -2,7 +2,8 @@ from django import forms
 from decimal import Decimal
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
-from .models import ClientProfile, Transaction, AgentProfile, AgentApplication, PricingSettings, AccountVerification
+from .models import ClientProfile, Transaction, AgentProfile, AgentApplication, PricingVersion, AccountVerification
+from .presence import online_agents
 
 
 class LoginForm(forms.Form):
@@ -70,7 +71,9 @@ class TransactionForm(forms.ModelForm):
         }
 
     def __init__(self, *args, **kwargs):
-        active_agents = kwargs.pop('active_agents', AgentProfile.objects.filter(is_online=True))
+        active_agents = kwargs.pop('active_agents', None)
+        if active_agents is None:
+            active_agents = online_agents()
         super().__init__(*args, **kwargs)
         field = self.fields['agent']
         field.queryset = active_agents
@@ -120,9 +123,9 @@ class AgentApplicationForm(forms.ModelForm):
         }
 
 
-class PricingSettingsForm(forms.ModelForm):
+class PricingVersionForm(forms.ModelForm):
     class Meta:
-        model = PricingSettings
+        model = PricingVersion
         fields = ['exchange_rate', 'transaction_fee_percent']
         widgets = {
             'exchange_rate': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
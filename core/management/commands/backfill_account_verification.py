@@ -0,0 +1,37 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.console_counters import VERIFICATION_COUNTERS, reconcile_counters
+from core.models import AccountVerification
+
+
+class Command(BaseCommand):
+    help = 'Create missing AccountVerification rows in bulk for users created before they were automatic'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        missing = User.objects.filter(accountverification__isnull=True).order_by('pk')
+        created = 0
+        last_pk = 0
+        while True:
+            # Keyset over user ids so each chunk is one indexed range scan
+            user_ids = list(missing.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not user_ids:
+                break
+            with transaction.atomic():
+                # ignore_conflicts: a row created concurrently by signup or OTP verification wins
+                AccountVerification.objects.bulk_create(
+                    [AccountVerification(user_id=user_id) for user_id in user_ids],
+                    ignore_conflicts=True,
+                )
+            created += len(user_ids)
+            last_pk = user_ids[-1]
+            self.stdout.write(f'Backfilled {created} user(s)...')
+        if created:
+            # ignore_conflicts hides how many rows were actually inserted, so recount
+            reconcile_counters(VERIFICATION_COUNTERS)
+        self.stdout.write(self.style.SUCCESS(f'Done: {created} AccountVerification row(s) created.'))
@@ -0,0 +1,284 @@
+import json
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import URLPattern, reverse
+from django.utils import timezone
+
+from core.models import AgentApplication, AgentProfile, AgentRequest, ClientProfile, Transaction
+from core.urls import urlpatterns
+from core.utils.pricing import get_pricing
+from core.utils.query_budget import track_queries
+from core.utils.seeding import SEED_PREFIX, seed_dataset
+from dust2cash.celery import app as celery_app
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / 'benchmarks' / 'routes.json'
+
+# Routes that cannot be timed as a single request/response
+SKIPPED_ROUTES = {
+    'event_stream': 'long-lived SSE stream',
+}
+
+# Query strings for routes that need request parameters to do their real work
+ROUTE_QUERIES = {
+    'quote_current': 'amount=100',
+    'quote': 'amount=100',
+}
+
+
+class _Rollback(Exception):
+    pass
+
+
+def _percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset inside a transaction, request every named route in core/urls.py '
+        'as the matching role, report latency and SQL cost per route, diff against a JSON baseline, '
+        'then roll everything back. SMS, email and Celery stay offline.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=500, help='Clients to seed')
+        parser.add_argument('--agents', type=int, default=50, help='Agents to seed')
+        parser.add_argument('--transactions', type=int, default=20_000, help='Transactions to seed')
+        parser.add_argument('--requests', type=int, default=None, help='Agent requests to seed (default: one per open transaction)')
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per route')
+        parser.add_argument('--warmup', type=int, default=1, help='Untimed requests per route before measuring')
+        parser.add_argument('--route', action='append', dest='routes', help='Only benchmark this route name (repeatable)')
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON to diff against')
+        parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run')
+        parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed p95 slowdown before flagging a regression')
+        parser.add_argument('--fail-on-regression', action='store_true', help='Exit non-zero when a route regresses')
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 1:
+            raise CommandError('--iterations must be at least 1')
+        results = {}
+        try:
+            with transaction.atomic(), self._offline():
+                context = self._seed(options)
+                for name, route, kwargs_names in self._routes(options['routes']):
+                    results[name] = self._benchmark(name, route, kwargs_names, context, options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        report = {
+            'meta': {
+                'database': connection.vendor,
+                'clients': options['clients'],
+                'agents': options['agents'],
+                'transactions': options['transactions'],
+                'requests': context['requests'],
+                'iterations': options['iterations'],
+                'recorded_at': timezone.now().isoformat(),
+            },
+            'routes': results,
+        }
+        self._print_report(results)
+
+        baseline_path = Path(options['baseline'])
+        regressions = []
+        if baseline_path.exists() and not options['update_baseline']:
+            baseline = json.loads(baseline_path.read_text())
+            regressions = self._diff(baseline, report, options['tolerance'])
+        else:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline_path.write_text(json.dumps(report, indent=2, sort_keys=True) + '\n')
+            self.stdout.write(self.style.SUCCESS(f'Baseline written to {baseline_path}'))
+
+        if regressions and options['fail_on_regression']:
+            raise CommandError(f"{len(regressions)} route(s) regressed: {', '.join(regressions)}")
+
+    def _offline(self):
+        stack = ExitStack()
+        stack.enter_context(mock.patch('core.utils.africas_talking._send_via_rest', return_value='benchmark-stub'))
+        stack.enter_context(mock.patch('core.utils.africas_talking._send_bulk_via_rest', return_value='benchmark-stub'))
+        # Without the Brevo helpers, mail falls back to the locmem backend set below
+        stack.enter_context(mock.patch('core.views.send_transactional_email', None))
+        stack.enter_context(mock.patch('core.views.send_transactional_emails', None))
+        stack.enter_context(mock.patch('core.notifications.send_transactional_email_batch', None))
+        stack.enter_context(override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver'],
+            REDIS_URL=None,
+        ))
+        # .delay() runs inline instead of needing a broker
+        always_eager = celery_app.conf.task_always_eager
+        celery_app.conf.task_always_eager = True
+        stack.callback(setattr, celery_app.conf, 'task_always_eager', always_eager)
+        return stack
+
+    def _seed(self, options):
+        started = time.perf_counter()
+        seeded = seed_dataset(
+            transactions=options['transactions'],
+            clients=options['clients'],
+            agents=options['agents'],
+            requests=options['requests'],
+        )
+        client = (
+            ClientProfile.objects.filter(pk__in=seeded['client_ids'])
+            .annotate(n=Count('transactions')).order_by('-n').select_related('user').first()
+        )
+        agent = (
+            AgentProfile.objects.filter(pk__in=seeded['agent_ids'], is_online=True)
+            .annotate(n=Count('transactions')).order_by('-n').select_related('user').first()
+        )
+        staff = User.objects.create_user(f'{SEED_PREFIX}staff', is_staff=True, is_superuser=True)
+        client_tx = Transaction.objects.filter(client=client).order_by('-created_at').first()
+        if client_tx is None:
+            client_tx = Transaction.objects.create(
+                client=client, platform='binance', currency='usdt', amount=Decimal('10'),
+                payment_method='mpesa', payment_phone='0700000000', status='pending',
+            )
+        agent_tx = Transaction.objects.filter(agent=agent).order_by('-created_at').first() or client_tx
+        open_request = AgentRequest.objects.filter(is_accepted=False, is_expired=False).first()
+        if open_request is None:
+            open_request = AgentRequest.objects.create(
+                transaction=client_tx, expires_at=timezone.now() + timedelta(minutes=15),
+            )
+        application = AgentApplication.objects.create(
+            full_name='Bench Applicant', email='applicant@bench.invalid', phone_number='0700000000',
+            country='Kenya', city='Nairobi', id_type='national_id', id_number='0', date_of_birth=date(1990, 1, 1),
+            years_of_experience=1, platforms_supported='binance', fiat_payout_methods='mpesa',
+            crypto_addresses='-', daily_liquidity_capacity=Decimal('1000'), compliance_experience='-',
+        )
+        self.stdout.write(
+            f"Seeded {len(seeded['client_ids'])} clients, {len(seeded['agent_ids'])} agents, "
+            f"{options['transactions']} transactions, {seeded['requests']} agent requests "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return {
+            'users': {'client': client.user, 'agent': agent.user, 'staff': staff},
+            'client_transaction': client_tx.pk,
+            'agent_transaction': agent_tx.pk,
+            'open_request': open_request.pk,
+            'pk': {
+                'admin_client': client.pk,
+                'admin_agent': agent.pk,
+                'admin_transaction': client_tx.pk,
+                'admin_application': application.pk,
+            },
+            'requests': seeded['requests'],
+        }
+
+    def _routes(self, only):
+        for pattern in urlpatterns:
+            if not isinstance(pattern, URLPattern) or not pattern.name:
+                continue
+            if only and pattern.name not in only:
+                continue
+            if pattern.name in SKIPPED_ROUTES:
+                self.stdout.write(f'Skipping {pattern.name}: {SKIPPED_ROUTES[pattern.name]}')
+                continue
+            yield pattern.name, str(pattern.pattern), list(pattern.pattern.converters)
+
+    @staticmethod
+    def _role(route):
+        if route.startswith('console/'):
+            return 'staff'
+        if route.startswith(('client/', 'accounts/')):
+            return 'client'
+        if route.startswith('agent/'):
+            return 'agent'
+        return None
+
+    @staticmethod
+    def _url(name, kwargs_names, context):
+        kwargs = {}
+        for kwarg in kwargs_names:
+            if kwarg == 'transaction_id':
+                kwargs[kwarg] = context['agent_transaction'] if name.startswith('agent_') else context['client_transaction']
+            elif kwarg == 'request_id':
+                kwargs[kwarg] = context['open_request']
+            elif kwarg == 'pk':
+                kwargs[kwarg] = next(pk for prefix, pk in context['pk'].items() if name.startswith(prefix))
+            elif kwarg == 'version':
+                kwargs[kwarg] = get_pricing().id
+        url = reverse(name, kwargs=kwargs)
+        return f'{url}?{ROUTE_QUERIES[name]}' if name in ROUTE_QUERIES else url
+
+    def _benchmark(self, name, route, kwargs_names, context, options):
+        role = self._role(route)
+        url = self._url(name, kwargs_names, context)
+        client = Client()
+        latencies, query_counts, sql_times = [], [], []
+        status = None
+        for iteration in range(options['warmup'] + options['iterations']):
+            # Log in again every time so routes like logout cannot change the role under test
+            if role:
+                client.force_login(context['users'][role])
+            with track_queries() as queries:
+                started = time.perf_counter()
+                response = client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            status = response.status_code
+            if iteration < options['warmup']:
+                continue
+            latencies.append(elapsed)
+            query_counts.append(queries.count)
+            sql_times.append(queries.total_ms)
+        return {
+            'url': url,
+            'role': role or 'anonymous',
+            'status': status,
+            'p50_ms': round(statistics.median(latencies), 2),
+            'p95_ms': round(_percentile(latencies, 95), 2),
+            'queries': max(query_counts),
+            'sql_ms': round(statistics.median(sql_times), 2),
+        }
+
+    def _print_report(self, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"\n{'route':<34} {'role':<10} {'status':>6} {'p50 ms':>9} {'p95 ms':>9} {'queries':>8} {'sql ms':>8}"
+        ))
+        for name, row in results.items():
+            self.stdout.write(
+                f"{name:<34} {row['role']:<10} {row['status']:>6} {row['p50_ms']:>9.2f} {row['p95_ms']:>9.2f} "
+                f"{row['queries']:>8} {row['sql_ms']:>8.2f}"
+            )
+
+    def _diff(self, baseline, report, tolerance):
+        self.stdout.write(self.style.MIGRATE_HEADING('\nCompared with baseline'))
+        regressions = []
+        previous_routes = baseline.get('routes', {})
+        for name, row in report['routes'].items():
+            previous = previous_routes.get(name)
+            if previous is None:
+                self.stdout.write(f'{name:<34} new route')
+                continue
+            slower = row['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+            more_queries = row['queries'] > previous['queries']
+            line = (
+                f"{name:<34} p95 {previous['p95_ms']:.2f} -> {row['p95_ms']:.2f} ms, "
+                f"queries {previous['queries']} -> {row['queries']}"
+            )
+            if slower or more_queries:
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(f'{line}  REGRESSION'))
+            else:
+                self.stdout.write(line)
+        for name in previous_routes.keys() - report['routes'].keys():
+            self.stdout.write(f'{name:<34} missing from this run')
+        return regressions
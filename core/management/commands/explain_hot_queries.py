@@ -0,0 +1,99 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from core.models import AgentProfile, AgentRequest, Transaction
+from core.utils.seeding import seed_dataset
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a synthetic dataset inside a transaction, print query plans for the hot '
+        'queries with and without the tuned indexes, then roll everything back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Number of transactions to seed')
+        parser.add_argument('--clients', type=int, default=None, help='Clients to seed (default rows / 50)')
+        parser.add_argument('--agents', type=int, default=200, help='Agents to seed')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                context = self._seed(options)
+                self._analyze()
+                self.stdout.write(self.style.MIGRATE_HEADING('\n=== With indexes ==='))
+                self._explain_all(context)
+                self._drop_tuned_indexes()
+                self._analyze()
+                self.stdout.write(self.style.MIGRATE_HEADING('\n=== Without indexes (baseline) ==='))
+                self._explain_all(context)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write(self.style.SUCCESS('\nSeed data and index changes rolled back.'))
+
+    def _seed(self, options):
+        rows = options['rows']
+        started = time.perf_counter()
+        seeded = seed_dataset(
+            transactions=rows,
+            clients=options['clients'] or max(rows // 50, 1),
+            agents=options['agents'],
+            batch_size=options['batch_size'],
+        )
+        self.stdout.write(
+            f"Seeded {len(seeded['client_ids'])} clients, {len(seeded['agent_ids'])} agents, {rows} transactions, "
+            f"{seeded['requests']} agent requests in {time.perf_counter() - started:.1f}s"
+        )
+        rng = seeded['rng']
+        return {
+            'client_id': rng.choice(seeded['client_ids']),
+            'agent_id': rng.choice(seeded['agent_ids']),
+            'now': seeded['now'],
+        }
+
+    def _hot_queries(self, context):
+        return [
+            ('client_dashboard history', Transaction.objects.filter(client_id=context['client_id']).order_by('-created_at', '-id')[:20]),
+            ('agent_portal active', Transaction.objects.filter(
+                agent_id=context['agent_id'], status__in=['agent_online', 'address_provided', 'crypto_received'],
+            ).order_by('-created_at')),
+            ('agent_portal pending requests', AgentRequest.objects.filter(
+                is_accepted=False, is_expired=False,
+            ).order_by('-requested_at')),
+            ('expire_agent_requests sweep', AgentRequest.objects.filter(
+                is_expired=False, is_accepted=False, expires_at__lt=context['now'],
+            )),
+            ('online agents', AgentProfile.objects.filter(is_online=True)),
+            ('reports status filter', Transaction.objects.filter(status='completed').order_by('-created_at')[:50]),
+            ('reports platform filter', Transaction.objects.filter(platform='bybit').order_by('-created_at')[:50]),
+        ]
+
+    def _explain_all(self, context):
+        analyze = connection.vendor == 'postgresql'
+        for label, queryset in self._hot_queries(context):
+            plan = queryset.explain(analyze=True) if analyze else queryset.explain()
+            started = time.perf_counter()
+            list(queryset)
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(self.style.SQL_TABLE(f'\n-- {label} (executed in {elapsed:.1f} ms)'))
+            self.stdout.write(plan)
+
+    def _drop_tuned_indexes(self):
+        # Plain DROP INDEX statements stay inside the surrounding transaction and roll back with it
+        editor = connection.schema_editor(atomic=False)
+        with connection.cursor() as cursor:
+            for model in (AgentProfile, AgentRequest, Transaction):
+                for index in model._meta.indexes:
+                    cursor.execute(str(index.remove_sql(model, editor)))
+
+    def _analyze(self):
+        if connection.vendor in ('postgresql', 'sqlite'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
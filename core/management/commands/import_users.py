@@ -0,0 +1,127 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from core.console_counters import increment
+from core.models import AccountVerification, AgentProfile, ClientProfile
+from core.notifications import send_welcome_emails
+from core.utils.provisioning import hash_passwords, password_hasher_pool, unique_usernames, username_base
+
+ROLES = ('agent', 'client')
+PROVIDED_PASSWORD_NOTE = '(the password you were given)'
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-provision agent or client accounts from a CSV or JSONL file. Columns: email (required), '
+        'first_name, last_name, phone_number, username, password, role.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or JSONL file (format taken from the extension)')
+        parser.add_argument('--role', choices=ROLES, help='Role for rows without a role column')
+        parser.add_argument('--batch-size', type=int, default=500, help='Accounts inserted per transaction')
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes (default: CPU count)')
+        parser.add_argument('--no-email', action='store_true', help='Skip the welcome emails')
+
+    def handle(self, *args, **options):
+        rows = self._read(Path(options['path']))
+        accounts = [self._normalize(index, row, options['role']) for index, row in enumerate(rows, start=1)]
+        batch_size = options['batch_size']
+        started = time.perf_counter()
+        self.emails_sent = 0
+        with password_hasher_pool(options['workers']) as pool:
+            for start in range(0, len(accounts), batch_size):
+                batch = accounts[start:start + batch_size]
+                self._import_batch(batch, pool, send_email=not options['no_email'])
+                self.stdout.write(f'Imported {start + len(batch)}/{len(accounts)} account(s)...')
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(accounts)} account(s) in {time.perf_counter() - started:.1f}s.'
+        ))
+        if not options['no_email']:
+            self.stdout.write(f'Sent {self.emails_sent} welcome email(s).')
+
+    def _read(self, path):
+        if not path.exists():
+            raise CommandError(f'{path} does not exist')
+        with path.open(newline='', encoding='utf-8-sig') as handle:
+            if path.suffix.lower() in ('.jsonl', '.ndjson'):
+                return [json.loads(line) for line in handle if line.strip()]
+            if path.suffix.lower() == '.csv':
+                return list(csv.DictReader(handle))
+        raise CommandError('Use a .csv or .jsonl file')
+
+    def _normalize(self, index, row, default_role):
+        row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+        role = (row.get('role') or default_role or '').lower()
+        if role not in ROLES:
+            raise CommandError(f'Row {index}: role must be one of {", ".join(ROLES)} (or pass --role)')
+        if not row.get('email'):
+            raise CommandError(f'Row {index}: email is required')
+        generated = not row.get('password')
+        return {
+            'role': role,
+            'email': row['email'],
+            'first_name': row.get('first_name', ''),
+            'last_name': row.get('last_name', ''),
+            'phone_number': row.get('phone_number', ''),
+            'username': username_base(row.get('username') or row['email']),
+            'password': get_random_string(12) if generated else row['password'],
+            'generated_password': generated,
+        }
+
+    def _send_welcome(self, batch):
+        self.emails_sent += send_welcome_emails(batch)
+
+    def _import_batch(self, batch, pool, *, send_email=True):
+        usernames = unique_usernames([account['username'] for account in batch])
+        hashed = hash_passwords([account['password'] for account in batch], pool)
+        with transaction.atomic():
+            # bulk_create skips post_save, so verification rows and console counters are handled below
+            users = User.objects.bulk_create([
+                User(
+                    username=username,
+                    email=account['email'],
+                    first_name=account['first_name'][:150],
+                    last_name=account['last_name'][:150],
+                    password=password_hash,
+                )
+                for account, username, password_hash in zip(batch, usernames, hashed)
+            ])
+            if users and users[0].pk is None:
+                by_username = dict(User.objects.filter(username__in=usernames).values_list('username', 'pk'))
+                for user in users:
+                    user.pk = by_username[user.username]
+            agents = AgentProfile.objects.bulk_create([
+                AgentProfile(user=user, email=account['email'], phone_number=account['phone_number'][:15] or 'N/A')
+                for account, user in zip(batch, users) if account['role'] == 'agent'
+            ])
+            clients = ClientProfile.objects.bulk_create([
+                ClientProfile(
+                    user=user,
+                    first_name=account['first_name'][:100],
+                    last_name=account['last_name'][:100],
+                    email=account['email'],
+                    phone_number=account['phone_number'][:15],
+                )
+                for account, user in zip(batch, users) if account['role'] == 'client'
+            ])
+            AccountVerification.objects.bulk_create([AccountVerification(user=user) for user in users])
+            increment('agents', len(agents))
+            increment('clients', len(clients))
+            increment('unverified_accounts', len(users))
+            for account, username in zip(batch, usernames):
+                account['username'] = username
+                account['name'] = f"{account['first_name']} {account['last_name']}".strip() or username
+                if not account['generated_password']:
+                    account['password'] = PROVIDED_PASSWORD_NOTE
+            if send_email:
+                # Mail each batch as it commits, so a later failing batch cannot strand these
+                # users without their temporary passwords
+                transaction.on_commit(lambda: self._send_welcome(batch))
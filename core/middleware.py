@@ -0,0 +1,28 @@
+from django.conf import settings
+
+from .utils.query_budget import report_queries, track_queries
+
+
+class QueryBudgetMiddleware:
+    """Log per-view query count, DB time, repeated statements and the slowest query.
+
+    Warns when a view exceeds its entry in settings.SQL_QUERY_BUDGETS. Queries run while a
+    streaming response is consumed happen after this returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = getattr(settings, 'SQL_QUERY_BUDGET_ENABLED', settings.DEBUG)
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+        with track_queries() as stats:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            report_queries('view', match.url_name or match.view_name, stats)
+        if settings.DEBUG:
+            response['X-SQL-Queries'] = str(stats.count)
+            response['X-SQL-Time-Ms'] = f'{stats.total_ms:.1f}'
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.26 on 2026-10-18 14:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_agentprofile_created_at_agentprofile_email_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='agentprofile',
+            index=models.Index(condition=models.Q(('is_online', True)), fields=['user'], name='agent_online_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agentrequest',
+            index=models.Index(condition=models.Q(('is_accepted', False), ('is_expired', False)), fields=['requested_at'], name='agentreq_open_requested_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='agentrequest',
+            index=models.Index(condition=models.Q(('is_accepted', False), ('is_expired', False)), fields=['expires_at'], name='agentreq_open_expires_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['client', '-created_at'], name='tx_client_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['agent', 'status', '-created_at'], name='tx_agent_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['status', '-created_at'], name='tx_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['platform', '-created_at'], name='tx_platform_created_idx'),
+        ),
+    ]
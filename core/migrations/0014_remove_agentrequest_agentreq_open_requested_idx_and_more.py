@@ -0,0 +1,21 @@
+# Generated by Django 4.2.26 on 2026-10-18 14:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_agentprofile_agent_online_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='agentrequest',
+            name='agentreq_open_requested_idx',
+        ),
+        migrations.AddIndex(
+            model_name='agentrequest',
+            index=models.Index(condition=models.Q(('is_accepted', False), ('is_expired', False)), fields=['requested_at', 'id'], name='agentreq_open_queue_idx'),
+        ),
+    ]
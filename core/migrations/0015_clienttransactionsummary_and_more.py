@@ -0,0 +1,41 @@
+# Generated by Django 4.2.26 on 2026-10-18 14:56
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_remove_agentrequest_agentreq_open_requested_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientTransactionSummary',
+            fields=[
+                ('client', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='transaction_summary', serialize=False, to='core.clientprofile')),
+                ('total_count', models.PositiveIntegerField(default=0)),
+                ('pending_count', models.PositiveIntegerField(default=0)),
+                ('agent_requested_count', models.PositiveIntegerField(default=0)),
+                ('agent_online_count', models.PositiveIntegerField(default=0)),
+                ('address_provided_count', models.PositiveIntegerField(default=0)),
+                ('crypto_received_count', models.PositiveIntegerField(default=0)),
+                ('payment_sent_count', models.PositiveIntegerField(default=0)),
+                ('completed_count', models.PositiveIntegerField(default=0)),
+                ('cancelled_count', models.PositiveIntegerField(default=0)),
+                ('volume_usdt', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=14)),
+                ('volume_ksh', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='transaction',
+            name='tx_client_created_idx',
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['client', '-created_at', '-id'], name='tx_client_history_idx'),
+        ),
+    ]
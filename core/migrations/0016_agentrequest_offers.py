@@ -0,0 +1,33 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_clienttransactionsummary_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='agentrequest',
+            name='offer_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='agentrequest',
+            name='offered_agents',
+            field=models.ManyToManyField(blank=True, related_name='offer_history', to='core.agentprofile'),
+        ),
+        migrations.AddField(
+            model_name='agentrequest',
+            name='offered_to',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='offered_requests', to='core.agentprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='agentrequest',
+            index=models.Index(condition=models.Q(('is_accepted', False), ('is_expired', False)), fields=['offered_to', 'requested_at', 'id'], name='agentreq_open_offer_idx'),
+        ),
+    ]
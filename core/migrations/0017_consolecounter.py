@@ -0,0 +1,21 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_agentrequest_offers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ConsoleCounter',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
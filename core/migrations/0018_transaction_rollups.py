@@ -0,0 +1,56 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:13
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_consolecounter'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupDirtyDay',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RollupWatermark',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('value', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransactionDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('platform', models.CharField(choices=[('binance', 'Binance'), ('bybit', 'Bybit'), ('bitget', 'Bitget')], max_length=20)),
+                ('currency', models.CharField(choices=[('usdt', 'USDT'), ('worldcoin', 'WorldCoin')], max_length=20)),
+                ('payment_method', models.CharField(choices=[('mpesa', 'M-Pesa'), ('airtel', 'Airtel Money')], max_length=20)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('agent_requested', 'Agent Requested'), ('agent_online', 'Agent Online'), ('address_provided', 'Address Provided'), ('crypto_received', 'Crypto Received'), ('payment_sent', 'Payment Sent'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('transaction_count', models.PositiveIntegerField(default=0)),
+                ('amount_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('fee_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16)),
+                ('receive_total', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=18)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['updated_at'], name='tx_updated_idx'),
+        ),
+        migrations.AddField(
+            model_name='transactiondailyrollup',
+            name='agent',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='core.agentprofile'),
+        ),
+        migrations.AddIndex(
+            model_name='transactiondailyrollup',
+            index=models.Index(fields=['day'], name='rollup_day_idx'),
+        ),
+    ]
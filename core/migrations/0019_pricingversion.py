@@ -0,0 +1,52 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:16
+
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+def carry_over_current_pricing(apps, schema_editor):
+    # The live settings row becomes version 1, in force since it was last saved. Older
+    # transactions stay unlinked: the pricing they were created under is not recorded anywhere.
+    PricingSettings = apps.get_model('core', 'PricingSettings')
+    PricingVersion = apps.get_model('core', 'PricingVersion')
+    current = PricingSettings.objects.first()
+    if current is not None:
+        PricingVersion.objects.create(
+            exchange_rate=current.exchange_rate,
+            transaction_fee_percent=current.transaction_fee_percent,
+            effective_from=current.updated_at,
+            created_by_id=current.updated_by_id,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('core', '0018_transaction_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PricingVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('exchange_rate', models.DecimalField(decimal_places=2, default=Decimal('100.00'), max_digits=10)),
+                ('transaction_fee_percent', models.DecimalField(decimal_places=2, default=Decimal('1.50'), max_digits=5)),
+                ('effective_from', models.DateTimeField(default=django.utils.timezone.now, unique=True)),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='pricing_versions', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-effective_from'],
+            },
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='pricing_version',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='transactions', to='core.pricingversion'),
+        ),
+        migrations.RunPython(carry_over_current_pricing, migrations.RunPython.noop),
+    ]
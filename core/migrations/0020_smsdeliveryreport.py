@@ -0,0 +1,30 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_pricingversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SmsDeliveryReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('message_id', models.CharField(max_length=100)),
+                ('phone_number', models.CharField(max_length=20)),
+                ('status', models.CharField(max_length=30)),
+                ('failure_reason', models.CharField(blank=True, max_length=100)),
+                ('network_code', models.CharField(blank=True, max_length=10)),
+                ('retry_count', models.PositiveSmallIntegerField(default=0)),
+                ('received_at', models.DateTimeField()),
+                ('stored_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['message_id'], name='smsdlr_message_idx'), models.Index(fields=['phone_number', '-received_at'], name='smsdlr_phone_received_idx'), models.Index(fields=['status', '-received_at'], name='smsdlr_status_received_idx'), models.Index(fields=['received_at', 'status'], name='smsdlr_received_status_idx')],
+            },
+        ),
+    ]
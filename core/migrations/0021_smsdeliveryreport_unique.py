@@ -0,0 +1,21 @@
+# Generated by Django 4.2.26 on 2026-10-18 15:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_smsdeliveryreport'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='smsdeliveryreport',
+            name='smsdlr_message_idx',
+        ),
+        migrations.AddConstraint(
+            model_name='smsdeliveryreport',
+            constraint=models.UniqueConstraint(fields=('message_id', 'status', 'received_at'), name='smsdlr_unique_report'),
+        ),
+    ]
@@ -41,17 +41,25 @@ class AgentProfile(models.Model):
     def go_online(self):
         self.is_online = True
         self.last_online = timezone.now()
-        self.save()
+        self.save(update_fields=['is_online', 'last_online'])
 
     def go_offline(self):
         self.is_online = False
-        self.save()
+        self.save(update_fields=['is_online'])
 
     def __str__(self):
         return f"Agent: {self.user.username}"
 
+    class Meta:
+        indexes = [
+            # Only a handful of agents are online at once; keep the "who is online" probe tiny
+            models.Index(fields=['user'], condition=models.Q(is_online=True), name='agent_online_idx'),
+        ]
+
 
 class PricingSettings(models.Model):
+    """Legacy single-row pricing, superseded by PricingVersion and kept only for its history."""
+
     exchange_rate = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('100.00'))
     transaction_fee_percent = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.50'))
     updated_at = models.DateTimeField(auto_now=True)
@@ -74,6 +82,40 @@ class PricingSettings(models.Model):
         return cls.objects.create()
 
 
+class PricingVersion(models.Model):
+    """One immutable pricing revision, in force from effective_from until the next one starts."""
+
+    exchange_rate = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('100.00'))
+    transaction_fee_percent = models.DecimalField(max_digits=5, decimal_places=2, default=Decimal('1.50'))
+    effective_from = models.DateTimeField(default=timezone.now, unique=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='pricing_versions'
+    )
+
+    class Meta:
+        ordering = ['-effective_from']
+
+    def __str__(self):
+        return f"Pricing v{self.pk} @ {self.exchange_rate} KSH/USDT ({self.transaction_fee_percent}% fee)"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Pricing versions are append-only; create a new version instead')
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def in_force(cls, at=None):
+        """The version in force at ``at`` (default now), creating the default one on a fresh install."""
+        version = cls.objects.filter(effective_from__lte=at or timezone.now()).first()
+        if version is None and at is None and not cls.objects.exists():
+            version = cls.objects.create()
+        return version
+
+
 class Transaction(models.Model):
     PLATFORM_CHOICES = [
         ('binance', 'Binance'),
@@ -112,6 +154,10 @@ class Transaction(models.Model):
 
     exchange_rate = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('100.00'))
     transaction_fee = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
+    # Null for transactions created before pricing was versioned
+    pricing_version = models.ForeignKey(
+        PricingVersion, on_delete=models.PROTECT, null=True, blank=True, related_name='transactions'
+    )
     amount_to_receive = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
 
     payment_method = models.CharField(max_length=20, choices=PAYMENT_METHOD_CHOICES)
@@ -137,6 +183,108 @@ class Transaction(models.Model):
     class Meta:
         verbose_name = "Transaction"
         verbose_name_plural = "Transactions"
+        indexes = [
+            # Keyset order of the client dashboard history: (created_at, id) descending
+            models.Index(fields=['client', '-created_at', '-id'], name='tx_client_history_idx'),
+            models.Index(fields=['agent', 'status', '-created_at'], name='tx_agent_status_created_idx'),
+            models.Index(fields=['status', '-created_at'], name='tx_status_created_idx'),
+            models.Index(fields=['platform', '-created_at'], name='tx_platform_created_idx'),
+            # Watermark scan of the daily rollup refresh
+            models.Index(fields=['updated_at'], name='tx_updated_idx'),
+        ]
+
+
+class ClientTransactionSummary(models.Model):
+    """Per-client counters kept in step with Transaction saves so the dashboard never scans history."""
+
+    SETTLED_STATUSES = ('payment_sent', 'completed')
+    OPEN_STATUSES = ('pending', 'agent_requested', 'agent_online', 'address_provided', 'crypto_received')
+
+    client = models.OneToOneField(
+        ClientProfile, on_delete=models.CASCADE, primary_key=True, related_name='transaction_summary'
+    )
+    total_count = models.PositiveIntegerField(default=0)
+    pending_count = models.PositiveIntegerField(default=0)
+    agent_requested_count = models.PositiveIntegerField(default=0)
+    agent_online_count = models.PositiveIntegerField(default=0)
+    address_provided_count = models.PositiveIntegerField(default=0)
+    crypto_received_count = models.PositiveIntegerField(default=0)
+    payment_sent_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    volume_usdt = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    volume_ksh = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def open_count(self):
+        return sum(getattr(self, f'{status}_count') for status in self.OPEN_STATUSES)
+
+    @property
+    def settled_count(self):
+        return sum(getattr(self, f'{status}_count') for status in self.SETTLED_STATUSES)
+
+    def __str__(self):
+        return f"Summary for {self.client}: {self.total_count} transactions"
+
+
+class TransactionDailyRollup(models.Model):
+    """Per-day transaction aggregates by platform, currency, payment method, status and agent.
+
+    Rebuilt a whole day at a time by core.reporting.refresh_daily_rollups; never edited in place.
+    """
+
+    day = models.DateField()
+    platform = models.CharField(max_length=20, choices=Transaction.PLATFORM_CHOICES)
+    currency = models.CharField(max_length=20, choices=Transaction.CURRENCY_CHOICES)
+    payment_method = models.CharField(max_length=20, choices=Transaction.PAYMENT_METHOD_CHOICES)
+    status = models.CharField(max_length=20, choices=Transaction.STATUS_CHOICES)
+    # No constraint: rows outlive deleted agents until their day is next rebuilt
+    agent = models.ForeignKey(
+        AgentProfile, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True, related_name='+'
+    )
+    transaction_count = models.PositiveIntegerField(default=0)
+    amount_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    fee_total = models.DecimalField(max_digits=16, decimal_places=2, default=Decimal('0.00'))
+    receive_total = models.DecimalField(max_digits=18, decimal_places=2, default=Decimal('0.00'))
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['day'], name='rollup_day_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.platform}/{self.currency}/{self.status}: {self.transaction_count}"
+
+
+class RollupWatermark(models.Model):
+    """How far (by Transaction.updated_at) a rollup has consumed changes."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.value}"
+
+
+class RollupDirtyDay(models.Model):
+    """Days touched by deletes, which leave no updated_at trace for the watermark to find."""
+
+    day = models.DateField(primary_key=True)
+
+    def __str__(self):
+        return str(self.day)
+
+
+class ConsoleCounter(models.Model):
+    """Materialised row counts for the admin console, kept current by signals and a reconcile task."""
+
+    name = models.CharField(max_length=50, primary_key=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
 
 
 class AgentRequest(models.Model):
@@ -145,17 +293,43 @@ class AgentRequest(models.Model):
     expires_at = models.DateTimeField()
     is_accepted = models.BooleanField(default=False)
     is_expired = models.BooleanField(default=False)
+    # The agent currently holding the offer; NULL once every online agent has passed and it is open to all
+    offered_to = models.ForeignKey(
+        AgentProfile, null=True, blank=True, on_delete=models.SET_NULL, related_name='offered_requests'
+    )
+    offer_expires_at = models.DateTimeField(null=True, blank=True)
+    offered_agents = models.ManyToManyField(AgentProfile, blank=True, related_name='offer_history')
 
-    def check_expiry(self):
-        if timezone.now() > self.expires_at and not self.is_accepted:
-            self.is_expired = True
-            self.save()
+    def is_lapsed(self, now=None):
+        """True once the request can no longer be accepted. Read-only: the expiry task persists it."""
+        if self.is_expired:
             return True
-        return False
+        return not self.is_accepted and (now or timezone.now()) > self.expires_at
 
     def __str__(self):
         return f"Request for Transaction {self.transaction.id}"
 
+    class Meta:
+        indexes = [
+            # Open requests are a tiny slice of the table; partial indexes skip the settled history
+            # Matches the portal queue's keyset order on (requested_at, id)
+            models.Index(
+                fields=['requested_at', 'id'],
+                condition=models.Q(is_accepted=False, is_expired=False),
+                name='agentreq_open_queue_idx',
+            ),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(is_accepted=False, is_expired=False),
+                name='agentreq_open_expires_idx',
+            ),
+            models.Index(
+                fields=['offered_to', 'requested_at', 'id'],
+                condition=models.Q(is_accepted=False, is_expired=False),
+                name='agentreq_open_offer_idx',
+            ),
+        ]
+
 
 class AgentApplication(models.Model):
     STATUS_PENDING = 'pending'
@@ -241,3 +415,31 @@ class AccountVerification(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.completion_score}%"
+
+
+class SmsDeliveryReport(models.Model):
+    """One Africa's Talking delivery callback; a message can report several times (Sent, then Success)."""
+
+    message_id = models.CharField(max_length=100)
+    phone_number = models.CharField(max_length=20)
+    status = models.CharField(max_length=30)
+    failure_reason = models.CharField(max_length=100, blank=True)
+    network_code = models.CharField(max_length=10, blank=True)
+    retry_count = models.PositiveSmallIntegerField(default=0)
+    received_at = models.DateTimeField()
+    stored_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            # Makes re-running a flush batch after a crash insert nothing twice; also serves message_id lookups
+            models.UniqueConstraint(fields=['message_id', 'status', 'received_at'], name='smsdlr_unique_report'),
+        ]
+        indexes = [
+            models.Index(fields=['phone_number', '-received_at'], name='smsdlr_phone_received_idx'),
+            models.Index(fields=['status', '-received_at'], name='smsdlr_status_received_idx'),
+            # Per-day delivery rates: a received_at range scan that never visits the table
+            models.Index(fields=['received_at', 'status'], name='smsdlr_received_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.message_id} -> {self.phone_number}: {self.status}"
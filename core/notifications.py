@@ -0,0 +1,271 @@
+import logging
+import re
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives
+from django.utils import timezone
+
+from .models import AgentRequest
+from .presence import online_agents
+
+logger = logging.getLogger(__name__)
+
+try:
+    from services.email.sib_client import send_transactional_email_batch
+except Exception:
+    send_transactional_email_batch = None
+
+from services.email import smtp_client
+
+# Messages handed to the pooled SMTP connection per send_messages() call
+SMTP_BATCH_SIZE = 100
+
+_PARAM_PATTERN = re.compile(r'\{\{\s*params\.(\w+)\s*\}\}')
+
+
+AGENT_REQUEST_SUBJECT = 'New Client Request on Dust2Cash'
+AGENT_REQUEST_MESSAGE = """
+Hi {{{{ params.name }}}},
+
+A client needs assistance with a crypto conversion:
+
+Transaction Details:
+- Client: {client}
+- Platform: {platform}
+- Currency: {currency}
+- Amount: {amount} {currency}
+- Payment Method: {payment_method}
+- Amount to Pay: KSH {amount_to_receive}
+
+This request is open to you for the next {respond_within}.
+
+To accept this request, please log in to the agent portal:
+https://dust2cash.com/agent/portal/
+
+Best regards,
+Dust2Cash Team
+"""
+
+# Kept within one 160-character SMS segment for typical amounts
+AGENT_REQUEST_SMS = (
+    'Dust2Cash: new request for {amount} {currency} on {platform}. '
+    'Accept within {respond_within} at https://dust2cash.com/agent/portal/'
+)
+
+WAITING_CLIENT_SUBJECT = 'Agent is Now Online - Dust2Cash'
+WAITING_CLIENT_MESSAGE = """
+Agent is Now Online - Dust2Cash
+
+Good news! An agent has come online and is ready to assist with your transaction.
+
+Your Transaction:
+- Platform: {{ params.platform }}
+- Amount: {{ params.amount }} {{ params.currency }}
+- To Receive: KSH {{ params.amount_to_receive }}
+
+Please log in to your dashboard to check the status:
+https://dust2cash.com/client/dashboard/
+
+The agent will review your request shortly.
+
+Best regards,
+Dust2Cash Team
+"""
+
+WELCOME_SUBJECT = 'Welcome to Dust2Cash'
+WELCOME_MESSAGE = """
+Hi {{ params.name }},
+
+Your Dust2Cash {{ params.role }} account is ready.
+
+Username: {{ params.username }}
+Temporary password: {{ params.password }}
+
+Please log in and change your password:
+https://dust2cash.com/login/
+
+Best regards,
+Dust2Cash Team
+"""
+
+
+def personalize(content, params):
+    """Substitute ``{{ params.<key> }}`` placeholders the way Brevo does server-side."""
+    params = params or {}
+    return _PARAM_PATTERN.sub(lambda match: str(params.get(match.group(1), '')), content)
+
+
+def _send_via_smtp(subject, text_content, recipients):
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'support@michaelnganga.me')
+    sent = 0
+    for start in range(0, len(recipients), SMTP_BATCH_SIZE):
+        batch = [
+            EmailMultiAlternatives(
+                subject,
+                personalize(text_content, recipient.get('params')),
+                from_email,
+                [recipient['email']],
+            )
+            for recipient in recipients[start:start + SMTP_BATCH_SIZE]
+        ]
+        sent += smtp_client.send_messages(batch)
+    return sent
+
+
+def send_bulk_email(*, subject, text_content, recipients):
+    """Send one rendered message to many recipients, batching through the provider.
+
+    Returns the number of recipients handed to the provider.
+    """
+    recipients = [recipient for recipient in recipients if recipient.get('email')]
+    if not recipients:
+        return 0
+    try:
+        if send_transactional_email_batch:
+            send_transactional_email_batch(
+                recipients,
+                subject,
+                html_content=text_content,
+                text_content=text_content,
+            )
+            return len(recipients)
+        return _send_via_smtp(subject, text_content, recipients)
+    except Exception:
+        logger.exception("Failed to send '%s' to %d recipient(s)", subject, len(recipients))
+        return 0
+
+
+def online_agent_recipients(agent_ids=None):
+    agents = online_agents()
+    if agent_ids is not None:
+        agents = agents.filter(pk__in=agent_ids)
+    agents = (
+        agents.exclude(user__email='')
+        .select_related('user')
+        .only('user__username', 'user__first_name', 'user__last_name', 'user__email')
+    )
+    return [
+        {
+            'email': agent.user.email,
+            'name': agent.user.get_full_name() or agent.user.username,
+            'params': {'name': agent.user.first_name or agent.user.username},
+        }
+        for agent in agents
+    ]
+
+
+def online_agent_phones(agent_ids=None):
+    agents = online_agents()
+    if agent_ids is not None:
+        agents = agents.filter(pk__in=agent_ids)
+    return list(agents.exclude(phone_number__in=['', 'N/A']).values_list('phone_number', flat=True))
+
+
+def send_bulk_sms_notification(message, phone_numbers):
+    """SMS channel: one message to many numbers in batched gateway calls.
+
+    Returns the number of recipients the gateway accepted.
+    """
+    if not phone_numbers:
+        return 0
+    from .utils.africas_talking import send_bulk_sms
+
+    try:
+        statuses = send_bulk_sms(phone_numbers, message)
+    except Exception:
+        logger.exception('Failed to send SMS to %d recipient(s)', len(phone_numbers))
+        return 0
+    rejected = [status for status in statuses if not status.delivered_to_gateway]
+    if rejected:
+        logger.warning(
+            'SMS rejected for %d of %d recipient(s): %s',
+            len(rejected), len(statuses), ', '.join(f'{status.number} ({status.status})' for status in rejected[:20]),
+        )
+    return len(statuses) - len(rejected)
+
+
+def waiting_client_recipients():
+    pending_requests = (
+        AgentRequest.objects.filter(is_accepted=False, is_expired=False)
+        .exclude(transaction__client__email='')
+        .select_related('transaction__client')
+    )
+    recipients = []
+    for agent_request in pending_requests:
+        transaction = agent_request.transaction
+        client = transaction.client
+        recipients.append({
+            'email': client.email,
+            'name': f"{client.first_name} {client.last_name}".strip(),
+            'params': {
+                'platform': transaction.get_platform_display(),
+                'amount': transaction.amount,
+                'currency': transaction.get_currency_display(),
+                'amount_to_receive': transaction.amount_to_receive,
+            },
+        })
+    return recipients
+
+
+def respond_within(deadline, now=None):
+    """Time left before ``deadline`` as alert text, e.g. '55 seconds' or '14 minutes'."""
+    seconds = max(0, round((deadline - (now or timezone.now())).total_seconds()))
+    if seconds < 120:
+        return f'{seconds} seconds'
+    return f'{seconds // 60} minutes'
+
+
+def notify_agents_of_request(transaction, agent_ids=None, *, respond_by):
+    """Email and text the offer to ``agent_ids`` (every online agent when None); ``respond_by`` is its deadline."""
+    within = respond_within(respond_by)
+    message = AGENT_REQUEST_MESSAGE.format(
+        respond_within=within,
+        client=f"{transaction.client.first_name} {transaction.client.last_name}",
+        platform=transaction.get_platform_display(),
+        currency=transaction.get_currency_display(),
+        amount=transaction.amount,
+        payment_method=transaction.get_payment_method_display(),
+        amount_to_receive=transaction.amount_to_receive,
+    )
+    emailed = send_bulk_email(
+        subject=AGENT_REQUEST_SUBJECT,
+        text_content=message,
+        recipients=online_agent_recipients(agent_ids),
+    )
+    texted = 0
+    if getattr(settings, 'AGENT_SMS_ALERTS_ENABLED', True):
+        sms = AGENT_REQUEST_SMS.format(
+            amount=transaction.amount,
+            currency=transaction.get_currency_display(),
+            platform=transaction.get_platform_display(),
+            respond_within=within,
+        )
+        texted = send_bulk_sms_notification(sms, online_agent_phones(agent_ids))
+    return {'email': emailed, 'sms': texted}
+
+
+def notify_waiting_clients():
+    return send_bulk_email(
+        subject=WAITING_CLIENT_SUBJECT,
+        text_content=WAITING_CLIENT_MESSAGE,
+        recipients=waiting_client_recipients(),
+    )
+
+
+def send_welcome_emails(accounts):
+    """One batched send for newly provisioned accounts.
+
+    Each account is a dict with email, name, role, username and password.
+    """
+    return send_bulk_email(
+        subject=WELCOME_SUBJECT,
+        text_content=WELCOME_MESSAGE,
+        recipients=[
+            {
+                'email': account['email'],
+                'name': account['name'],
+                'params': {key: account[key] for key in ('name', 'role', 'username', 'password')},
+            }
+            for account in accounts
+        ],
+    )
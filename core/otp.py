@@ -0,0 +1,243 @@
+import hashlib
+import hmac
+import logging
+import secrets
+import threading
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .utils.phone import normalize_phone_number
+from .utils.redis_client import get_redis
+from .utils.throttle import Bucket, take
+
+logger = logging.getLogger(__name__)
+
+# A send still queued after this long is dropped: the user has asked again or given up by then
+OTP_TASK_EXPIRES_SECONDS = 120
+# Set while a send for the phone is queued or running; repeat requests in that window are folded into it.
+# It outlives the task's expiry plus a gateway call, so a backed-up queue never holds two sends for one phone.
+OTP_IN_FLIGHT_KEY = 'otp:inflight:{phone}'
+OTP_IN_FLIGHT_SECONDS = OTP_TASK_EXPIRES_SECONDS + 30
+
+QUEUED = 'queued'
+SENT = 'sent'
+COALESCED = 'coalesced'
+THROTTLED = 'throttled'
+
+# Hash of salt, digest and wrong-guess counts for the code currently out for a phone
+OTP_CODE_KEY = 'otp:code:{phone}'
+# Present while one requester is locked out of a phone after too many wrong codes.
+# Lockouts are per requester, so guessing at someone else's number cannot lock its owner out.
+OTP_LOCK_KEY = 'otp:lock:{phone}:{requester}'
+
+VERIFIED = 'verified'
+INVALID = 'invalid'
+EXPIRED = 'expired'
+LOCKED = 'locked'
+
+# KEYS: code hash, requester's lock key. ARGV: keyed hash of the submitted code, requester,
+# max attempts per requester, lockout seconds, max wrong guesses per code across all requesters.
+# Compares and deletes in one step, so a code can be used once and guesses are always counted.
+_VERIFY_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+  return 'locked'
+end
+local state = redis.call('HMGET', KEYS[1], 'salt', 'digest')
+if not state[1] then
+  return 'expired'
+end
+if redis.sha1hex(state[1] .. ARGV[1]) == state[2] then
+  redis.call('DEL', KEYS[1])
+  return 'verified'
+end
+local result = 'invalid'
+if redis.call('HINCRBY', KEYS[1], 'attempts:' .. ARGV[2], 1) >= tonumber(ARGV[3]) then
+  redis.call('HDEL', KEYS[1], 'attempts:' .. ARGV[2])
+  redis.call('SET', KEYS[2], 1, 'EX', ARGV[4])
+  result = 'locked'
+end
+if redis.call('HINCRBY', KEYS[1], 'guesses', 1) >= tonumber(ARGV[5]) then
+  redis.call('DEL', KEYS[1])
+end
+return result
+"""
+
+_verify_script = None
+# Process-local fallback without Redis: phone -> code state and (phone, requester) -> locked_until.
+# It is only consistent because request_otp then sends inline, so store_otp and check_otp both run
+# in the web process; the otp worker is used only when Redis is shared by both.
+_local_codes = {}
+_local_locks = {}
+_local_lock = threading.Lock()
+
+
+def otp_ttl():
+    return getattr(settings, 'OTP_TTL_SECONDS', 300)
+
+
+def _verify(client):
+    global _verify_script
+    if _verify_script is None:
+        _verify_script = client.register_script(_VERIFY_SCRIPT)
+    return _verify_script
+
+
+def _requester(user):
+    return str(user.pk) if user is not None and user.is_authenticated else 'anonymous'
+
+
+def _keyed_hash(phone, code):
+    # Peppered with SECRET_KEY, so a dump of the store cannot be brute-forced offline
+    return hmac.new(settings.SECRET_KEY.encode(), f'{phone}:{code}'.encode(), hashlib.sha256).hexdigest()
+
+
+def _digest(salt, keyed_hash):
+    # Same construction as redis.sha1hex(salt .. hash) in the verify script
+    return hashlib.sha1(f'{salt}{keyed_hash}'.encode()).hexdigest()
+
+
+def store_otp(phone, code):
+    """Replace the phone's outstanding code with a salted hash of ``code``.
+
+    Without REDIS_URL this must run in the process that will call check_otp; see request_otp.
+    """
+    salt = secrets.token_hex(16)
+    digest = _digest(salt, _keyed_hash(phone, code))
+    client = get_redis()
+    if client is None:
+        with _local_lock:
+            _local_codes[phone] = {
+                'salt': salt, 'digest': digest, 'guesses': 0, 'attempts': {},
+                'expires_at': time.monotonic() + otp_ttl(),
+            }
+        return
+    key = OTP_CODE_KEY.format(phone=phone)
+    pipe = client.pipeline()
+    pipe.delete(key)
+    pipe.hset(key, mapping={'salt': salt, 'digest': digest, 'guesses': 0})
+    pipe.expire(key, otp_ttl())
+    pipe.execute()
+
+
+def _check_local(phone, requester, keyed_hash, max_attempts, lockout, max_guesses):
+    now = time.monotonic()
+    with _local_lock:
+        if _local_locks.get((phone, requester), 0) > now:
+            return LOCKED
+        state = _local_codes.get(phone)
+        if state is None or state['expires_at'] <= now:
+            _local_codes.pop(phone, None)
+            return EXPIRED
+        if hmac.compare_digest(_digest(state['salt'], keyed_hash), state['digest']):
+            del _local_codes[phone]
+            return VERIFIED
+        state['guesses'] += 1
+        if state['guesses'] >= max_guesses:
+            del _local_codes[phone]
+        attempts = state['attempts'][requester] = state['attempts'].get(requester, 0) + 1
+        if attempts >= max_attempts:
+            del state['attempts'][requester]
+            _local_locks[(phone, requester)] = now + lockout
+            return LOCKED
+        return INVALID
+
+
+def check_otp(phone, code, *, user=None):
+    """Verify and consume the phone's code in one round-trip. Returns VERIFIED, INVALID, EXPIRED or LOCKED.
+
+    Wrong codes lock out only the ``user`` who sent them. Past OTP_MAX_CODE_GUESSES wrong codes from
+    anyone the code is burned, and its owner requests a new one.
+    """
+    requester = _requester(user)
+    keyed_hash = _keyed_hash(phone, code)
+    max_attempts = getattr(settings, 'OTP_MAX_ATTEMPTS', 5)
+    lockout = getattr(settings, 'OTP_LOCKOUT_SECONDS', 900)
+    max_guesses = getattr(settings, 'OTP_MAX_CODE_GUESSES', 15)
+    client = get_redis()
+    if client is None:
+        return _check_local(phone, requester, keyed_hash, max_attempts, lockout, max_guesses)
+    result = _verify(client)(
+        keys=[OTP_CODE_KEY.format(phone=phone), OTP_LOCK_KEY.format(phone=phone, requester=requester)],
+        args=[keyed_hash, requester, max_attempts, lockout, max_guesses],
+    )
+    return result.decode() if isinstance(result, bytes) else result
+
+
+def lockout_remaining(phone, user=None):
+    """Seconds until ``user`` may verify codes for a phone again, or 0."""
+    requester = _requester(user)
+    client = get_redis()
+    if client is None:
+        with _local_lock:
+            return max(0, int(_local_locks.get((phone, requester), 0) - time.monotonic()))
+    return max(0, client.ttl(OTP_LOCK_KEY.format(phone=phone, requester=requester)))
+
+
+@dataclass(frozen=True)
+class OtpRequest:
+    status: str
+    phone: str
+    retry_after: int = 0
+
+    @property
+    def accepted(self):
+        return self.status != THROTTLED
+
+
+def _buckets(phone, user):
+    phone_capacity, phone_period = getattr(settings, 'OTP_THROTTLE_PER_PHONE', (3, 600))
+    buckets = [Bucket(f'otp:bucket:phone:{phone}', phone_capacity, phone_period)]
+    if user is not None and user.is_authenticated:
+        user_capacity, user_period = getattr(settings, 'OTP_THROTTLE_PER_USER', (5, 3600))
+        buckets.append(Bucket(f'otp:bucket:user:{user.pk}', user_capacity, user_period))
+    return buckets
+
+
+def request_otp(phone_number, *, user=None):
+    """Throttle, coalesce and queue an OTP send; returns at once without touching the gateway.
+
+    Without REDIS_URL there is no store the otp worker shares with this process, so the code is
+    sent inline instead and stored where check_otp will look for it.
+    Raises ValueError for a phone number that cannot be normalized or a gateway failure on an inline send.
+    """
+    phone = normalize_phone_number(phone_number)
+    locked_for = lockout_remaining(phone, user)
+    if locked_for:
+        # A new code could not be verified until the lockout ends, so do not spend an SMS on it
+        return OtpRequest(THROTTLED, phone, locked_for)
+    in_flight_key = OTP_IN_FLIGHT_KEY.format(phone=phone)
+    if cache.get(in_flight_key):
+        return OtpRequest(COALESCED, phone)
+    decision = take(_buckets(phone, user))
+    if not decision.allowed:
+        logger.info('OTP request for %s throttled for %ss', phone, decision.retry_after)
+        return OtpRequest(THROTTLED, phone, decision.retry_after)
+    if not cache.add(in_flight_key, 1, timeout=OTP_IN_FLIGHT_SECONDS):
+        # Lost a race with a concurrent request for the same number
+        return OtpRequest(COALESCED, phone)
+
+    if get_redis() is None:
+        from .utils.africas_talking import send_otp
+
+        try:
+            send_otp(phone)
+        finally:
+            finish_otp_send(phone)
+        return OtpRequest(SENT, phone)
+
+    from .tasks import send_otp_task
+
+    try:
+        send_otp_task.apply_async(args=[phone], expires=OTP_TASK_EXPIRES_SECONDS)
+    except Exception:
+        # Nothing was queued, so retries must not be coalesced into it
+        cache.delete(in_flight_key)
+        raise
+    return OtpRequest(QUEUED, phone)
+
+
+def finish_otp_send(phone):
+    cache.delete(OTP_IN_FLIGHT_KEY.format(phone=phone))
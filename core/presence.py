@@ -0,0 +1,135 @@
+import logging
+import time
+from datetime import datetime, timezone as dt_timezone
+
+import redis
+from django.conf import settings
+from django.db.models import Q
+
+from .models import AgentProfile
+from .utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Sorted set of agent ids scored by their last heartbeat (unix seconds)
+PRESENCE_KEY = 'presence:agents'
+
+def presence_ttl():
+    return getattr(settings, 'AGENT_PRESENCE_TTL_SECONDS', 90)
+
+
+def _cutoff():
+    return time.time() - presence_ttl()
+
+
+def mark_online(agent_id):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.zadd(PRESENCE_KEY, {agent_id: time.time()})
+    except redis.RedisError as exc:
+        # The DB flag is already set; sync_presence reconciles the set once Redis is back
+        logger.warning('Could not mark agent %s online in Redis: %s', agent_id, exc)
+
+
+def mark_offline(agent_id):
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        client.zrem(PRESENCE_KEY, agent_id)
+    except redis.RedisError as exc:
+        logger.warning('Could not mark agent %s offline in Redis: %s', agent_id, exc)
+
+
+def heartbeat(agent_id):
+    """Refresh an online agent. Returns False if they already timed out and must go online again."""
+    client = get_redis()
+    if client is None:
+        return AgentProfile.objects.filter(pk=agent_id, is_online=True).exists()
+    try:
+        # XX: only refresh existing members, so a heartbeat never brings an offline agent back
+        client.zadd(PRESENCE_KEY, {agent_id: time.time()}, xx=True)
+        score = client.zscore(PRESENCE_KEY, agent_id)
+    except redis.RedisError as exc:
+        logger.warning('Presence unavailable; using the DB flag for agent %s: %s', agent_id, exc)
+        return AgentProfile.objects.filter(pk=agent_id, is_online=True).exists()
+    return score is not None and score >= _cutoff()
+
+
+def _live_ids(client):
+    """Agent ids with a recent heartbeat, or None if Redis cannot be reached."""
+    try:
+        return [int(member) for member in client.zrangebyscore(PRESENCE_KEY, _cutoff(), '+inf')]
+    except redis.RedisError as exc:
+        logger.warning('Presence unavailable; falling back to the DB online flag: %s', exc)
+        return None
+
+
+def online_agent_ids():
+    client = get_redis()
+    ids = None if client is None else _live_ids(client)
+    if ids is None:
+        return list(AgentProfile.objects.filter(is_online=True).values_list('pk', flat=True))
+    return ids
+
+
+def any_agent_online():
+    client = get_redis()
+    if client is not None:
+        try:
+            return bool(client.zrangebyscore(PRESENCE_KEY, _cutoff(), '+inf', start=0, num=1))
+        except redis.RedisError as exc:
+            logger.warning('Presence unavailable; falling back to the DB online flag: %s', exc)
+    return AgentProfile.objects.filter(is_online=True).exists()
+
+
+def online_agents():
+    """Queryset of online agents; skips the database entirely when nobody is online."""
+    client = get_redis()
+    ids = None if client is None else _live_ids(client)
+    if ids is None:
+        return AgentProfile.objects.filter(is_online=True)
+    if not ids:
+        return AgentProfile.objects.none()
+    return AgentProfile.objects.filter(pk__in=ids)
+
+
+def sync_presence():
+    """Reconcile the DB online flag with the presence set and write last_online back in one batch.
+
+    Agents whose heartbeats stopped leave the set; every agent flagged online in the DB without a
+    live heartbeat (timed out, or missing after a Redis flush or restart) is taken offline.
+    Returns (ids taken offline, number of agents whose last_online was written).
+    """
+    client = get_redis()
+    if client is None:
+        return [], 0
+    cutoff = _cutoff()
+    try:
+        pipe = client.pipeline()
+        pipe.zremrangebyscore(PRESENCE_KEY, '-inf', f'({cutoff}')
+        pipe.zrangebyscore(PRESENCE_KEY, cutoff, '+inf', withscores=True)
+        _, live = pipe.execute()
+    except redis.RedisError as exc:
+        logger.warning('Presence unavailable; skipping the sync: %s', exc)
+        return [], 0
+    # Agents who went online within the TTL are left alone: their ZADD may have raced this read
+    went_online_before_cutoff = Q(last_online__lt=datetime.fromtimestamp(cutoff, tz=dt_timezone.utc)) | Q(
+        last_online__isnull=True
+    )
+    orphaned = AgentProfile.objects.filter(went_online_before_cutoff, is_online=True).exclude(
+        pk__in=[int(member) for member, _ in live]
+    )
+    stale_ids = list(orphaned.values_list('pk', flat=True))
+    if stale_ids:
+        # Bulk UPDATE skips the model signals, so no presence or availability events fire from here
+        AgentProfile.objects.filter(pk__in=stale_ids, is_online=True).update(is_online=False)
+    seen = [
+        AgentProfile(pk=int(member), last_online=datetime.fromtimestamp(score, tz=dt_timezone.utc))
+        for member, score in live
+    ]
+    if seen:
+        AgentProfile.objects.bulk_update(seen, ['last_online'], batch_size=500)
+    return stale_ids, len(seen)
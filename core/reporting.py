@@ -0,0 +1,183 @@
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+from typing import List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from .models import RollupDirtyDay, RollupWatermark, Transaction, TransactionDailyRollup
+
+DAILY_ROLLUP = 'transaction_daily'
+ROLLUP_DIMENSIONS = ('platform', 'currency', 'payment_method', 'status', 'agent_id')
+# Days rebuilt per aggregate query during a refresh
+REBUILD_CHUNK_DAYS = 31
+ZERO = Decimal('0')
+
+
+def rollup_lag():
+    """Changes newer than this are left for the next run: a row can commit after its updated_at."""
+    return timedelta(seconds=getattr(settings, 'REPORT_ROLLUP_LAG_SECONDS', 120))
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def mark_day_dirty(created_at):
+    """Queue the day a deleted transaction belonged to for a rebuild on the next refresh."""
+    day = timezone.localdate(created_at)
+    RollupDirtyDay.objects.bulk_create([RollupDirtyDay(day=day)], ignore_conflicts=True)
+
+
+def rebuild_days(days):
+    """Replace the rollup rows of ``days`` with fresh aggregates, one grouped query per chunk."""
+    days = sorted(days)
+    for start in range(0, len(days), REBUILD_CHUNK_DAYS):
+        chunk = days[start:start + REBUILD_CHUNK_DAYS]
+        in_chunk = reduce(or_, (
+            Q(created_at__gte=bounds[0], created_at__lt=bounds[1]) for bounds in map(_day_bounds, chunk)
+        ))
+        groups = (
+            Transaction.objects.filter(in_chunk)
+            .annotate(day=TruncDate('created_at'))
+            .values('day', *ROLLUP_DIMENSIONS)
+            .annotate(
+                transaction_count=Count('id'),
+                amount_total=Coalesce(Sum('amount'), ZERO),
+                fee_total=Coalesce(Sum('transaction_fee'), ZERO),
+                receive_total=Coalesce(Sum('amount_to_receive'), ZERO),
+            )
+            .order_by()
+        )
+        rows = [TransactionDailyRollup(**group) for group in groups]
+        TransactionDailyRollup.objects.filter(day__in=chunk).delete()
+        TransactionDailyRollup.objects.bulk_create(rows, batch_size=1000)
+
+
+def refresh_daily_rollups(*, full=False):
+    """Rebuild every day that has changed since the watermark, then advance it.
+
+    A day is rebuilt when any of its transactions was created or updated since the last run, or
+    was deleted (see RollupDirtyDay). ``full`` rebuilds all of history.
+    Returns {'days': days rebuilt, 'watermark': new watermark}.
+    """
+    high = timezone.now() - rollup_lag()
+    with transaction.atomic():
+        # The row lock keeps overlapping runs from interleaving their rebuilds
+        RollupWatermark.objects.bulk_create([RollupWatermark(name=DAILY_ROLLUP)], ignore_conflicts=True)
+        watermark = RollupWatermark.objects.select_for_update().get(name=DAILY_ROLLUP)
+        changed = Transaction.objects.filter(updated_at__lte=high)
+        if watermark.value and not full:
+            changed = changed.filter(updated_at__gt=watermark.value)
+        days = set(
+            changed.annotate(day=TruncDate('created_at')).values_list('day', flat=True).order_by().distinct()
+        )
+        dirty = list(RollupDirtyDay.objects.values_list('day', flat=True))
+        days.update(dirty)
+        if full:
+            TransactionDailyRollup.objects.all().delete()
+        rebuild_days(days)
+        RollupDirtyDay.objects.filter(day__in=dirty).delete()
+        watermark.value = high
+        watermark.save(update_fields=['value'])
+    return {'days': len(days), 'watermark': high}
+
+
+@dataclass
+class DailyPoint:
+    day: object
+    count: int
+    amount: Decimal
+    receive: Decimal
+    percent: int
+
+
+@dataclass
+class BreakdownRow:
+    key: object
+    label: str
+    count: int
+    amount: Decimal
+    fees: Decimal
+    receive: Decimal
+    percent: int
+
+
+def _percent(value, largest):
+    return round(100 * value / largest) if largest else 0
+
+
+def daily_series(since, until):
+    """One point per day in [since, until], zero-filled; ``percent`` scales each bar to the busiest day."""
+    totals = {
+        row['day']: row
+        for row in TransactionDailyRollup.objects.filter(day__gte=since, day__lte=until)
+        .values('day')
+        .annotate(count=Sum('transaction_count'), amount=Sum('amount_total'), receive=Sum('receive_total'))
+        .order_by()
+    }
+    days = [since + timedelta(days=offset) for offset in range((until - since).days + 1)]
+    largest = max((row['count'] for row in totals.values()), default=0)
+    points = []
+    for day in days:
+        row = totals.get(day, {})
+        count = row.get('count') or 0
+        points.append(DailyPoint(
+            day=day,
+            count=count,
+            amount=row.get('amount') or ZERO,
+            receive=row.get('receive') or ZERO,
+            percent=_percent(count, largest),
+        ))
+    return points
+
+
+def breakdown(dimension, since, until, *, limit=None):
+    """Totals over [since, until] grouped by one rollup dimension, largest first."""
+    if dimension == 'agent':
+        rows = (
+            TransactionDailyRollup.objects.filter(day__gte=since, day__lte=until)
+            .values('agent_id', 'agent__user__username')
+        )
+        key, labels = 'agent_id', None
+    else:
+        rows = TransactionDailyRollup.objects.filter(day__gte=since, day__lte=until).values(dimension)
+        key = dimension
+        labels = dict(TransactionDailyRollup._meta.get_field(dimension).choices)
+    rows = list(
+        rows.annotate(
+            count=Sum('transaction_count'),
+            amount=Sum('amount_total'),
+            fees=Sum('fee_total'),
+            receive=Sum('receive_total'),
+        ).order_by('-count')[:limit]
+    )
+    largest = rows[0]['count'] if rows else 0
+    result: List[BreakdownRow] = []
+    for row in rows:
+        value = row[key]
+        if labels is None:
+            label = row['agent__user__username'] or ('Unassigned' if value is None else f'Agent #{value}')
+        else:
+            label = labels.get(value, value)
+        result.append(BreakdownRow(
+            key=value,
+            label=label,
+            count=row['count'],
+            amount=row['amount'],
+            fees=row['fees'],
+            receive=row['receive'],
+            percent=_percent(row['count'], largest),
+        ))
+    return result
+
+
+def rollups_as_of():
+    return RollupWatermark.objects.filter(name=DAILY_ROLLUP).values_list('value', flat=True).first()
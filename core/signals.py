@@ -1,13 +1,177 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 
-from .models import AccountVerification
+from .client_summary import apply_transaction_change, rebuild_client_summary, transaction_state
+from .console_counters import (
+    ROW_COUNTERS, VERIFICATION_COUNTERS, increment, move, reconcile_counters, verification_counter,
+)
+from .events import publish_agent_availability, publish_queue_change, publish_transaction_status
+from .models import (
+    AccountVerification, AgentApplication, AgentProfile, AgentRequest, ClientProfile, PricingVersion, Transaction,
+)
+from .presence import any_agent_online, mark_offline, mark_online
+from .reporting import mark_day_dirty
+from .utils.pricing import bump_pricing_generation
 
 
 @receiver(post_save, sender=User)
-def create_verification(sender, instance, created, **kwargs):
-    account, created_account = AccountVerification.objects.get_or_create(user=instance)
-    if created_account or created:
-        account.refresh_completion()
-        account.save(update_fields=['completion_score', 'limits_unlocked', 'updated_at'])
+def create_verification(sender, instance, created, raw=False, **kwargs):
+    # Only on creation: logins and profile edits also save the User and must stay write-free here
+    if created and not raw:
+        AccountVerification.objects.create(user=instance)
+
+
+@receiver(post_save, sender=PricingVersion)
+@receiver(post_delete, sender=PricingVersion)
+def invalidate_pricing_snapshot(sender, instance, **kwargs):
+    # Wait for commit so other workers never reload the row before it is visible.
+    transaction.on_commit(bump_pricing_generation)
+
+
+@receiver(post_init, sender=Transaction)
+def remember_summary_state(sender, instance, **kwargs):
+    instance._summary_state = transaction_state(instance) if instance.pk else None
+
+
+@receiver(post_save, sender=Transaction)
+def update_client_summary(sender, instance, created, **kwargs):
+    new_state = transaction_state(instance)
+    old_state = None if created else instance._summary_state
+    if new_state is None or (old_state is None and not created):
+        # Deferred fields hide what changed; recount the affected client instead of guessing
+        rebuild_client_summary(instance.client_id)
+    elif old_state != new_state:
+        apply_transaction_change(old_state, new_state)
+    old_status = old_state[1] if old_state else None
+    if 'status' in instance.__dict__ and instance.status != old_status:
+        publish_transaction_status(instance.pk, instance.client_id, instance.status, instance.get_status_display())
+    instance._summary_state = new_state
+
+
+@receiver(post_delete, sender=Transaction)
+def remove_from_client_summary(sender, instance, origin=None, **kwargs):
+    # Deleting a client or user cascades to its summary row too; only direct deletes adjust it
+    if not isinstance(origin, Transaction) and getattr(origin, 'model', None) is not Transaction:
+        return
+    state = transaction_state(instance)
+    if state is None:
+        rebuild_client_summary(instance.client_id)
+    else:
+        apply_transaction_change(state, None)
+
+
+def _is_open(agent_request):
+    values = agent_request.__dict__
+    if 'is_accepted' not in values or 'is_expired' not in values:
+        return None
+    return not values['is_accepted'] and not values['is_expired']
+
+
+@receiver(post_init, sender=AgentRequest)
+def remember_queue_state(sender, instance, **kwargs):
+    instance._was_open = _is_open(instance) if instance.pk else False
+
+
+@receiver(post_save, sender=AgentRequest)
+def announce_queue_change(sender, instance, created, **kwargs):
+    is_open = _is_open(instance)
+    if is_open is not None and is_open != instance._was_open:
+        publish_queue_change(instance.pk, 'opened' if is_open else 'closed')
+    instance._was_open = is_open
+
+
+@receiver(post_init, sender=AgentProfile)
+def remember_online_state(sender, instance, **kwargs):
+    instance._was_online = instance.__dict__.get('is_online')
+
+
+@receiver(post_save, sender=AgentProfile)
+def track_agent_presence(sender, instance, **kwargs):
+    is_online = instance.__dict__.get('is_online')
+    if is_online is not None and is_online != instance._was_online:
+        if is_online:
+            mark_online(instance.pk)
+        else:
+            mark_offline(instance.pk)
+        publish_agent_availability(any_agent_online())
+    instance._was_online = is_online
+
+
+@receiver(post_save, sender=ClientProfile)
+@receiver(post_save, sender=AgentProfile)
+@receiver(post_save, sender=Transaction)
+def count_created_row(sender, instance, created, **kwargs):
+    if created:
+        increment(ROW_COUNTERS[sender])
+
+
+@receiver(post_delete, sender=ClientProfile)
+@receiver(post_delete, sender=AgentProfile)
+@receiver(post_delete, sender=Transaction)
+def count_deleted_row(sender, instance, **kwargs):
+    # Cascades send post_delete per row too, so deleting a user keeps these exact
+    increment(ROW_COUNTERS[sender], -1)
+
+
+@receiver(post_delete, sender=Transaction)
+def dirty_rollup_day(sender, instance, **kwargs):
+    if instance.__dict__.get('created_at') is not None:
+        mark_day_dirty(instance.created_at)
+
+
+@receiver(post_init, sender=AccountVerification)
+def remember_verification_state(sender, instance, **kwargs):
+    instance._was_unlocked = instance.__dict__.get('limits_unlocked') if instance.pk else None
+
+
+@receiver(post_save, sender=AccountVerification)
+def count_verification(sender, instance, created, **kwargs):
+    unlocked = instance.__dict__.get('limits_unlocked')
+    if created and unlocked is not None:
+        increment(verification_counter(unlocked))
+    elif unlocked is None or instance._was_unlocked is None:
+        # Deferred fields hide the previous state; recount rather than guess
+        reconcile_counters(VERIFICATION_COUNTERS)
+    else:
+        move(verification_counter(instance._was_unlocked), verification_counter(unlocked))
+    instance._was_unlocked = unlocked
+
+
+@receiver(post_delete, sender=AccountVerification)
+def uncount_verification(sender, instance, **kwargs):
+    unlocked = instance.__dict__.get('limits_unlocked')
+    if unlocked is None:
+        reconcile_counters(VERIFICATION_COUNTERS)
+    else:
+        increment(verification_counter(unlocked), -1)
+
+
+def _is_pending(application):
+    status = application.__dict__.get('status')
+    return None if status is None else status == AgentApplication.STATUS_PENDING
+
+
+@receiver(post_init, sender=AgentApplication)
+def remember_application_state(sender, instance, **kwargs):
+    instance._was_pending = _is_pending(instance) if instance.pk else False
+
+
+@receiver(post_save, sender=AgentApplication)
+def count_pending_application(sender, instance, created, **kwargs):
+    is_pending = _is_pending(instance)
+    if is_pending is None or instance._was_pending is None:
+        reconcile_counters(['pending_applications'])
+    elif is_pending != instance._was_pending:
+        increment('pending_applications', 1 if is_pending else -1)
+    instance._was_pending = is_pending
+
+
+@receiver(post_delete, sender=AgentApplication)
+def uncount_pending_application(sender, instance, **kwargs):
+    is_pending = _is_pending(instance)
+    if is_pending is None:
+        reconcile_counters(['pending_applications'])
+    elif is_pending:
+        increment('pending_applications', -1)
@@ -0,0 +1,209 @@
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime, time
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import LockError
+
+from .models import SmsDeliveryReport
+from .utils.phone import normalize_phone_number
+from .utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Webhook payloads waiting to be written, oldest first
+DELIVERY_REPORT_BUFFER_KEY = 'sms:delivery_reports'
+# The batch a flush is writing; left behind by a crashed flush, it is written first on the next run
+DELIVERY_REPORT_PROCESSING_KEY = 'sms:delivery_reports:processing'
+# Payloads that could not be parsed or inserted, newest last, for inspection by hand
+DELIVERY_REPORT_DEAD_KEY = 'sms:delivery_reports:dead'
+DEAD_LETTER_MAX = 10_000
+# Held while a flush runs, so two flushes never share the processing list
+FLUSH_LOCK_KEY = 'sms:delivery_reports:flush-lock'
+FLUSH_LOCK_SECONDS = 300
+# Reports written per flush round-trip
+FLUSH_BATCH_SIZE = 1000
+DELIVERED_STATUSES = ('Success',)
+# Every status Africa's Talking sends to the delivery callback
+REPORT_STATUSES = ('Sent', 'Submitted', 'Buffered', 'Rejected', 'Success', 'Failed', 'AbsentSubscriber')
+PAYLOAD_FIELDS = ('id', 'status', 'phoneNumber', 'networkCode', 'failureReason', 'retryCount')
+
+
+class InvalidDeliveryReport(ValueError):
+    pass
+
+
+def clean_delivery_payload(data):
+    """The callback fields we store, checked; raises InvalidDeliveryReport for anything else."""
+    payload = {field: str(data.get(field) or '').strip() for field in PAYLOAD_FIELDS}
+    if not payload['id'] or len(payload['id']) > 100:
+        raise InvalidDeliveryReport('Missing or oversized message id')
+    if payload['status'] not in REPORT_STATUSES:
+        raise InvalidDeliveryReport(f'Unknown status {payload["status"][:30]!r}')
+    try:
+        payload['phoneNumber'] = normalize_phone_number(payload['phoneNumber'])
+    except ValueError as exc:
+        raise InvalidDeliveryReport(str(exc))
+    return payload
+
+
+def _report_from_payload(payload):
+    try:
+        retry_count = int(payload.get('retryCount') or 0)
+    except ValueError:
+        retry_count = 0
+    return SmsDeliveryReport(
+        message_id=(payload.get('id') or '')[:100],
+        phone_number=(payload.get('phoneNumber') or '')[:20],
+        status=(payload.get('status') or 'Unknown')[:30],
+        failure_reason=(payload.get('failureReason') or '')[:100],
+        network_code=(payload.get('networkCode') or '')[:10],
+        retry_count=max(0, min(retry_count, 32767)),
+        received_at=parse_datetime(payload.get('received_at') or '') or timezone.now(),
+    )
+
+
+def buffer_delivery_report(data):
+    """Validate a callback and queue it for the next flush, so the webhook stays fast.
+
+    Raises InvalidDeliveryReport for a bad payload. Returns False, without storing anything,
+    when the buffer already holds SMS_DELIVERY_BUFFER_MAX reports.
+    """
+    payload = dict(clean_delivery_payload(data), received_at=timezone.now().isoformat())
+    client = get_redis()
+    if client is None:
+        _report_from_payload(payload).save()
+        return True
+    if client.llen(DELIVERY_REPORT_BUFFER_KEY) >= getattr(settings, 'SMS_DELIVERY_BUFFER_MAX', 100_000):
+        logger.warning('Delivery report buffer is full; refusing report %s', payload['id'])
+        return False
+    client.rpush(DELIVERY_REPORT_BUFFER_KEY, json.dumps(payload))
+    return True
+
+
+def _dead_letter(client, raw_items):
+    pipe = client.pipeline()
+    pipe.rpush(DELIVERY_REPORT_DEAD_KEY, *raw_items)
+    pipe.ltrim(DELIVERY_REPORT_DEAD_KEY, -DEAD_LETTER_MAX, -1)
+    pipe.execute()
+
+
+def _store_batch(client, raw_items):
+    """Insert one batch from the processing list, then clear it. Returns how many rows were written.
+
+    The insert ignores rows already stored, so re-running a batch after a crash is harmless.
+    If the batch insert fails, rows are retried one at a time and those that still fail are
+    dead-lettered, so one bad payload cannot hold up every later flush.
+    """
+    parsed, dead = [], []
+    for raw in raw_items:
+        try:
+            parsed.append((raw, _report_from_payload(json.loads(raw))))
+        except (ValueError, TypeError, AttributeError):
+            dead.append(raw)
+    try:
+        with transaction.atomic():
+            SmsDeliveryReport.objects.bulk_create([report for _, report in parsed], ignore_conflicts=True)
+        stored = len(parsed)
+    except DatabaseError:
+        logger.exception('Bulk insert of %d delivery reports failed; retrying row by row', len(parsed))
+        stored = 0
+        for raw, report in parsed:
+            try:
+                with transaction.atomic():
+                    SmsDeliveryReport.objects.bulk_create([report], ignore_conflicts=True)
+                stored += 1
+            except DatabaseError:
+                dead.append(raw)
+    if dead:
+        logger.warning('Dead-lettered %d delivery report(s) to %s', len(dead), DELIVERY_REPORT_DEAD_KEY)
+        _dead_letter(client, dead)
+    client.delete(DELIVERY_REPORT_PROCESSING_KEY)
+    return stored
+
+
+def flush_delivery_reports(max_batches=50):
+    """Move buffered reports into the database with bulk_create. Returns how many were stored.
+
+    Each batch is moved with LMOVE onto a processing list before it is written and dropped only
+    afterwards, so a worker that dies mid-flush loses nothing: the next run writes it first.
+    """
+    client = get_redis()
+    if client is None:
+        return 0
+    lock = client.lock(FLUSH_LOCK_KEY, timeout=FLUSH_LOCK_SECONDS)
+    if not lock.acquire(blocking=False):
+        return 0
+    try:
+        stored = 0
+        leftover = client.lrange(DELIVERY_REPORT_PROCESSING_KEY, 0, -1)
+        if leftover:
+            stored += _store_batch(client, leftover)
+        for _ in range(max_batches):
+            pipe = client.pipeline(transaction=False)
+            for _ in range(FLUSH_BATCH_SIZE):
+                pipe.lmove(DELIVERY_REPORT_BUFFER_KEY, DELIVERY_REPORT_PROCESSING_KEY, 'LEFT', 'RIGHT')
+            moved = [raw for raw in pipe.execute() if raw is not None]
+            if not moved:
+                break
+            stored += _store_batch(client, moved)
+            if len(moved) < FLUSH_BATCH_SIZE:
+                break
+    finally:
+        try:
+            lock.release()
+        except LockError:
+            logger.warning('Delivery report flush outlived its lock')
+    return stored
+
+
+@dataclass
+class DeliveryRate:
+    day: object
+    total: int
+    delivered: int
+    failed: int
+
+    @property
+    def rate(self):
+        return round(100 * self.delivered / self.total, 1) if self.total else None
+
+
+def _final_reports():
+    # Intermediate callbacks (Sent, Submitted, Buffered) are not outcomes; count only final ones
+    return SmsDeliveryReport.objects.filter(status__in=('Success', 'Failed', 'Rejected'))
+
+
+def _rate_aggregates():
+    return {
+        'total': Count('id'),
+        'delivered': Count('id', filter=Q(status__in=DELIVERED_STATUSES)),
+        'failed': Count('id', filter=~Q(status__in=DELIVERED_STATUSES)),
+    }
+
+
+def delivery_rates_by_day(since):
+    """Final delivery outcomes per day from ``since`` (a date), oldest first."""
+    start = timezone.make_aware(datetime.combine(since, time.min))
+    rows = (
+        _final_reports().filter(received_at__gte=start)
+        .annotate(day=TruncDate('received_at'))
+        .values('day')
+        .annotate(**_rate_aggregates())
+        .order_by('day')
+    )
+    return [DeliveryRate(**row) for row in rows]
+
+
+def phone_delivery_history(phone_number, limit=20):
+    """Latest callbacks and the overall delivery rate for one number; raises ValueError if it is invalid."""
+    phone = normalize_phone_number(phone_number)
+    reports = SmsDeliveryReport.objects.filter(phone_number=phone)
+    totals = _final_reports().filter(phone_number=phone).aggregate(**_rate_aggregates())
+    return phone, list(reports.order_by('-received_at')[:limit]), DeliveryRate(day=None, **totals)
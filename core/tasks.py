@@ -1,7 +1,41 @@
+from datetime import timedelta
+
 from celery import shared_task
+from celery.signals import task_postrun, task_prerun
+from django.conf import settings
+from django.db import transaction as db_transaction
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
+from .client_summary import bulk_update_status
+from .console_counters import reconcile_counters
+from .events import publish_agent_availability, publish_queue_change, publish_transaction_status
 from .models import Transaction, AgentRequest
+from .presence import any_agent_online, sync_presence
+from .reporting import refresh_daily_rollups
+from .sms_reports import flush_delivery_reports
+from .utils.query_budget import report_queries, track_queries
+
+# task_id -> (context manager, stats) for tasks running in this worker process
+_query_trackers = {}
+
+
+@task_prerun.connect
+def start_query_tracking(task_id=None, task=None, **kwargs):
+    if not getattr(settings, 'SQL_QUERY_BUDGET_ENABLED', settings.DEBUG):
+        return
+    tracker = track_queries()
+    _query_trackers[task_id] = (tracker, tracker.__enter__())
+
+
+@task_postrun.connect
+def finish_query_tracking(task_id=None, task=None, **kwargs):
+    entry = _query_trackers.pop(task_id, None)
+    if entry is None:
+        return
+    tracker, stats = entry
+    tracker.__exit__(None, None, None)
+    report_queries('task', task.name, stats)
 
 
 @shared_task
@@ -13,12 +47,117 @@ def send_payment_confirmation_task(transaction_id):
 
 
 @shared_task
-def expire_agent_requests():
+def notify_agents_of_request_task(transaction_id, agent_ids=None, respond_by=None):
+    """``respond_by`` is the ISO deadline of the offer; without it the request's own expiry is used."""
+    from .notifications import notify_agents_of_request
+
+    transaction = Transaction.objects.select_related('client', 'agent_request').get(id=transaction_id)
+    respond_by = parse_datetime(respond_by) if respond_by else transaction.agent_request.expires_at
+    return notify_agents_of_request(transaction, agent_ids=agent_ids, respond_by=respond_by)
+
+
+@shared_task
+def escalate_agent_offer(agent_request_id, agent_id, offer_expires_at=None):
+    """Pass an unanswered offer on; a no-op if the agent claimed it, it already moved, or the
+    agent now holds a renewed offer with a different ``offer_expires_at`` (ISO) than this task's."""
+    from .dispatch import offer_next
+
+    expected_expiry = parse_datetime(offer_expires_at) if offer_expires_at else None
+    offered = offer_next(agent_request_id, expected_holder=agent_id, expected_expiry=expected_expiry)
+    return offered.pk if offered else None
+
+
+@shared_task
+def notify_waiting_clients_task():
+    from .notifications import notify_waiting_clients
+
+    return notify_waiting_clients()
+
+
+def _expire_due_requests(requests):
+    """Expire due, unaccepted requests and cancel their transactions with set-based UPDATEs."""
     now = timezone.now()
-    requests = AgentRequest.objects.filter(is_expired=False, is_accepted=False, expires_at__lt=now)
-    updated = requests.update(is_expired=True)
-    for agent_request in AgentRequest.objects.filter(pk__in=requests.values_list('pk', flat=True)):
-        transaction = agent_request.transaction
-        transaction.status = 'cancelled'
-        transaction.save(update_fields=['status'])
-    return updated
+    with db_transaction.atomic():
+        transaction_ids = list(
+            requests.filter(is_accepted=False, is_expired=False, expires_at__lte=now)
+            .select_for_update(skip_locked=True)
+            .values_list('transaction_id', flat=True)
+        )
+        if not transaction_ids:
+            return 0
+        due = AgentRequest.objects.filter(transaction_id__in=transaction_ids, is_accepted=False, is_expired=False)
+        expired_ids = list(due.values_list('pk', flat=True))
+        expired = due.update(is_expired=True)
+        cancelled = Transaction.objects.filter(pk__in=transaction_ids, status='agent_requested')
+        cancelled_rows = list(cancelled.values_list('pk', 'client_id'))
+        bulk_update_status(cancelled, 'cancelled', updated_at=now)
+        # Bulk UPDATEs skip model signals, so announce the changes here
+        for request_id in expired_ids:
+            publish_queue_change(request_id, 'closed')
+        status_display = dict(Transaction.STATUS_CHOICES)['cancelled']
+        for transaction_id, client_id in cancelled_rows:
+            publish_transaction_status(transaction_id, client_id, 'cancelled', status_display)
+    return expired
+
+
+def schedule_agent_request_expiry(agent_request):
+    """Queue an ETA task that expires the request the moment its TTL runs out."""
+    request_id = agent_request.pk
+    # A second of slack so the worker's clock is safely past expires_at when it runs
+    eta = agent_request.expires_at + timedelta(seconds=1)
+    db_transaction.on_commit(lambda: expire_agent_request.apply_async(args=[request_id], eta=eta))
+
+
+@shared_task
+def expire_agent_request(agent_request_id):
+    # A renewed request has a later expires_at, so a stale ETA task is a no-op
+    return _expire_due_requests(AgentRequest.objects.filter(pk=agent_request_id))
+
+
+@shared_task
+def expire_agent_requests():
+    """Reconciliation sweep for ETA tasks lost to worker restarts or broker outages."""
+    return _expire_due_requests(AgentRequest.objects.all())
+
+
+@shared_task
+def sync_agent_presence():
+    """Take agents whose portal heartbeats stopped offline and batch-write last_online."""
+    stale_ids, refreshed = sync_presence()
+    if stale_ids:
+        publish_agent_availability(any_agent_online())
+    return {'offline': len(stale_ids), 'refreshed': refreshed}
+
+
+@shared_task
+def reconcile_console_counters():
+    """Correct drift in the console counters left by writes that bypassed the model signals."""
+    return reconcile_counters()
+
+
+@shared_task
+def refresh_transaction_rollups(full=False):
+    """Fold transactions changed since the last run into the daily report rollups."""
+    result = refresh_daily_rollups(full=full)
+    return {'days': result['days'], 'watermark': result['watermark'].isoformat()}
+
+
+@shared_task(ignore_result=True)
+def send_otp_task(phone):
+    """Send an OTP from the dedicated otp queue; see core.otp.request_otp for throttling."""
+    from .otp import finish_otp_send
+    from .utils.africas_talking import send_otp
+
+    try:
+        send_otp(phone)
+    except ValueError:
+        # Gateway trouble is logged by send_otp; the user can ask again once the throttle allows
+        pass
+    finally:
+        finish_otp_send(phone)
+
+
+@shared_task
+def flush_sms_delivery_reports():
+    """Write delivery callbacks buffered by the webhook to SmsDeliveryReport in bulk."""
+    return flush_delivery_reports()
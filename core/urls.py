@@ -7,6 +7,8 @@ urlpatterns = [
     path('about/', views.about_page, name='about'),
     path('contact/', views.contact_page, name='contact'),
     path('pricing/', views.pricing_page, name='pricing'),
+    path('quote/', views.quote_redirect, name='quote_current'),
+    path('quote/<int:version>/', views.quote, name='quote'),
     path('how-it-works/', views.how_it_works_page, name='how_it_works'),
     path('features/', views.features_page, name='features'),
     path('login/', views.login_view, name='login'),
@@ -26,6 +28,9 @@ urlpatterns = [
     path('webhooks/africastalking/delivery/', views.sms_delivery_report, name='sms_delivery_report'),
 
     path('agent/portal/', views.agent_portal, name='agent_portal'),
+    path('agent/queue/', views.agent_queue, name='agent_queue'),
+    path('agent/heartbeat/', views.agent_heartbeat, name='agent_heartbeat'),
+    path('events/', views.event_stream, name='event_stream'),
     path('agent/request/<int:request_id>/accept/', views.agent_accept_request, name='agent_accept_request'),
     path('agent/transaction/<int:transaction_id>/provide-address/', views.agent_provide_address, name='agent_provide_address'),
     path('agent/transaction/<int:transaction_id>/confirm-receipt/', views.agent_confirm_receipt, name='agent_confirm_receipt'),
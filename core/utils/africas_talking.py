@@ -1,12 +1,19 @@
 import os
+import asyncio
+import json
 import logging
 import random
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 import httpx
+from asgiref.sync import sync_to_async
 from httpx import HTTPError
-from django.core.cache import cache
 from core.models import AccountVerification
+from core.otp import VERIFIED, check_otp, store_otp
 from core.utils.phone import normalize_phone_number
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
 username = os.getenv('AFRICAS_TALKING_USERNAME', 'sandbox')
 api_key = os.getenv('AFRICAS_TALKING_API_KEY')
@@ -14,7 +21,84 @@ sms_api_url = os.getenv('AFRICAS_TALKING_SMS_URL', 'https://api.sandbox.africast
 if not api_key:
     logging.warning('AFRICAS_TALKING_API_KEY is unset; SMS sending will fail.')
 
-OTP_CACHE_KEY = 'otp:{phone}'
+# Fail fast on an unreachable gateway instead of pinning a sync worker for 30s
+SMS_TIMEOUT = httpx.Timeout(
+    float(os.getenv('AFRICAS_TALKING_READ_TIMEOUT', '10')),
+    connect=float(os.getenv('AFRICAS_TALKING_CONNECT_TIMEOUT', '3')),
+)
+SMS_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=60.0)
+
+# Numbers per comma-separated `to` in one bulk request, and bulk requests in flight at once
+# (kept within SMS_LIMITS.max_connections so batches never queue for a connection)
+SMS_MAX_RECIPIENTS_PER_REQUEST = int(os.getenv('AFRICAS_TALKING_MAX_RECIPIENTS', '100'))
+SMS_BULK_CONCURRENCY = int(os.getenv('AFRICAS_TALKING_BULK_CONCURRENCY', '4'))
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+# Event loop -> (AsyncClient, generator that closes it when the loop shuts down)
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def _reset_clients():
+    # A forked child must not reuse the parent's sockets; rebuild on next use.
+    global _client, _client_pid, _async_clients
+    _client = None
+    _client_pid = None
+    _async_clients = weakref.WeakKeyDictionary()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_clients)
+
+
+def _headers() -> Dict[str, str]:
+    return {
+        'apiKey': api_key or '',
+        'Accept': 'application/json',
+        'Content-Type': 'application/x-www-form-urlencoded',
+    }
+
+
+def _get_client() -> httpx.Client:
+    """Process-wide HTTP/2 client so consecutive SMS reuse one TLS session."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _client_lock:
+        if _client is None or _client_pid != pid:
+            # httpx handles TLS/HTTP2 better than requests on OpenSSL 3.x
+            _client = httpx.Client(http2=True, timeout=SMS_TIMEOUT, limits=SMS_LIMITS)
+            _client_pid = pid
+    return _client
+
+
+async def _close_with_loop(loop, client):
+    # Parked at its first yield: the loop's shutdown_asyncgens() (run by asyncio.run on exit)
+    # closes this generator, which closes the client while its loop can still run the cleanup
+    try:
+        yield
+    finally:
+        _async_clients.pop(loop, None)
+        await client.aclose()
+
+
+async def _get_async_client() -> httpx.AsyncClient:
+    """AsyncClient for the running event loop; concurrent sends multiplex over HTTP/2.
+
+    Each loop gets its own client, closed when that loop shuts down, so per-task asyncio.run
+    calls do not leak connections.
+    """
+    loop = asyncio.get_running_loop()
+    entry = _async_clients.get(loop)
+    if entry is None:
+        client = httpx.AsyncClient(http2=True, timeout=SMS_TIMEOUT, limits=SMS_LIMITS)
+        closer = _close_with_loop(loop, client)
+        # The first step registers the generator with the loop for shutdown_asyncgens()
+        await closer.asend(None)
+        entry = _async_clients[loop] = (client, closer)
+    return entry[0]
 
 
 def _send_via_rest(phone_number: str, message: str) -> str:
@@ -23,39 +107,162 @@ def _send_via_rest(phone_number: str, message: str) -> str:
         'to': phone_number,
         'message': message,
     }
-    headers = {
-        'apiKey': api_key or '',
-        'Content-Type': 'application/x-www-form-urlencoded',
+    response = _get_client().post(sms_api_url, headers=_headers(), data=payload)
+    logging.info("Africa's Talking raw response: %s", response.text)
+    response.raise_for_status()
+    return response.text
+
+
+async def _send_via_rest_async(phone_number: str, message: str) -> str:
+    payload = {
+        'username': username,
+        'to': phone_number,
+        'message': message,
     }
-    # httpx handles TLS/HTTP2 better than requests on OpenSSL 3.x
-    with httpx.Client(http2=True, timeout=30.0) as client:
-        response = client.post(sms_api_url, headers=headers, data=payload)
-        logging.info("Africa's Talking raw response: %s", response.text)
-        response.raise_for_status()
-        return response.text
+    client = await _get_async_client()
+    response = await client.post(sms_api_url, headers=_headers(), data=payload)
+    logging.info("Africa's Talking raw response: %s", response.text)
+    response.raise_for_status()
+    return response.text
 
 
-def send_otp(phone_number: str) -> str:
+def _send_bulk_via_rest(phone_numbers: List[str], message: str) -> str:
+    payload = {
+        'username': username,
+        'to': ','.join(phone_numbers),
+        'message': message,
+    }
+    response = _get_client().post(sms_api_url, headers=_headers(), data=payload)
+    logging.info("Africa's Talking bulk response for %d recipient(s): %s", len(phone_numbers), response.text)
+    response.raise_for_status()
+    return response.text
+
+
+@dataclass(frozen=True)
+class SmsRecipientStatus:
+    number: str
+    status: str
+    status_code: Optional[int] = None
+    message_id: Optional[str] = None
+    cost: Optional[str] = None
+
+    @property
+    def delivered_to_gateway(self):
+        # 100 Processed, 101 Sent, 102 Queued; anything else was rejected for this number
+        return self.status_code in (100, 101, 102)
+
+
+def _parse_recipients(phone_numbers: List[str], body: str) -> List[SmsRecipientStatus]:
+    """Per-number results from a messaging response; numbers it does not mention are reported as Unknown."""
+    try:
+        recipients = json.loads(body)['SMSMessageData']['Recipients']
+    except (ValueError, KeyError, TypeError):
+        logging.warning("Unparseable Africa's Talking response: %s", body)
+        recipients = []
+    by_number = {
+        entry.get('number'): SmsRecipientStatus(
+            number=entry.get('number'),
+            status=entry.get('status', 'Unknown'),
+            status_code=entry.get('statusCode'),
+            message_id=entry.get('messageId') or None,
+            cost=entry.get('cost'),
+        )
+        for entry in recipients
+    }
+    return [by_number.get(number) or SmsRecipientStatus(number=number, status='Unknown') for number in phone_numbers]
+
+
+def _send_batch(phone_numbers: List[str], message: str) -> List[SmsRecipientStatus]:
+    try:
+        body = _send_bulk_via_rest(phone_numbers, message)
+    except HTTPError as exc:
+        logging.error('Bulk SMS batch of %d failed: %s', len(phone_numbers), exc)
+        return [SmsRecipientStatus(number=number, status='GatewayError') for number in phone_numbers]
+    return _parse_recipients(phone_numbers, body)
+
+
+def send_bulk_sms(phone_numbers, message: str) -> List[SmsRecipientStatus]:
+    """Send one message to many numbers in as few gateway calls as the per-request limit allows.
+
+    Numbers are normalized and de-duplicated, split into batches of SMS_MAX_RECIPIENTS_PER_REQUEST,
+    and the batches are posted concurrently. Returns one status per number, including invalid ones.
+    """
+    statuses = []
+    numbers = []
+    seen = set()
+    for raw in phone_numbers:
+        try:
+            number = normalize_phone_number(raw)
+        except ValueError:
+            statuses.append(SmsRecipientStatus(number=str(raw), status='InvalidPhoneNumber'))
+            continue
+        if number not in seen:
+            seen.add(number)
+            numbers.append(number)
+    batches = [
+        numbers[start:start + SMS_MAX_RECIPIENTS_PER_REQUEST]
+        for start in range(0, len(numbers), SMS_MAX_RECIPIENTS_PER_REQUEST)
+    ]
+    if len(batches) == 1:
+        statuses.extend(_send_batch(batches[0], message))
+    elif batches:
+        # The shared httpx client is thread-safe; each batch takes its own pooled connection
+        with ThreadPoolExecutor(max_workers=min(SMS_BULK_CONCURRENCY, len(batches))) as pool:
+            for batch_statuses in pool.map(lambda batch: _send_batch(batch, message), batches):
+                statuses.extend(batch_statuses)
+    return statuses
+
+
+def _build_otp(phone_number: str):
     normalized_phone = normalize_phone_number(phone_number)
     logging.info('Normalized phone number: %s', normalized_phone)
     otp = str(random.randint(100000, 999999))
-    message = f"Your Dust2Cash verification code is {otp}"
+    return normalized_phone, otp, f"Your Dust2Cash verification code is {otp}"
+
+
+def send_sms(phone_number: str, message: str) -> str:
+    try:
+        return _send_via_rest(normalize_phone_number(phone_number), message)
+    except HTTPError as exc:
+        logging.error('Failed to send SMS via REST API: %s', exc)
+        raise ValueError('Unable to reach the SMS gateway; please try again later.') from exc
+
+
+async def send_sms_async(phone_number: str, message: str) -> str:
+    try:
+        return await _send_via_rest_async(normalize_phone_number(phone_number), message)
+    except HTTPError as exc:
+        logging.error('Failed to send SMS via REST API: %s', exc)
+        raise ValueError('Unable to reach the SMS gateway; please try again later.') from exc
+
+
+def send_otp(phone_number: str) -> str:
+    normalized_phone, otp, message = _build_otp(phone_number)
     try:
         gateway_response = _send_via_rest(normalized_phone, message)
     except HTTPError as exc:
         logging.error('Failed to send OTP via REST API: %s', exc)
         raise ValueError('Unable to reach the SMS gateway; please try again later.') from exc
-    cache.set(OTP_CACHE_KEY.format(phone=normalized_phone), otp, timeout=300)
+    store_otp(normalized_phone, otp)
+    return gateway_response
+
+
+async def send_otp_async(phone_number: str) -> str:
+    normalized_phone, otp, message = _build_otp(phone_number)
+    try:
+        gateway_response = await _send_via_rest_async(normalized_phone, message)
+    except HTTPError as exc:
+        logging.error('Failed to send OTP via REST API: %s', exc)
+        raise ValueError('Unable to reach the SMS gateway; please try again later.') from exc
+    await sync_to_async(store_otp)(normalized_phone, otp)
     return gateway_response
 
 
-def verify_otp(phone_number: str, user_input: str, *, user=None) -> bool:
+def verify_otp(phone_number: str, user_input: str, *, user=None) -> str:
+    """Check a submitted code; returns core.otp's VERIFIED, INVALID, EXPIRED or LOCKED."""
     normalized_phone = normalize_phone_number(phone_number)
-    cached_otp = cache.get(OTP_CACHE_KEY.format(phone=normalized_phone))
-    if cached_otp and cached_otp == user_input:
-        cache.delete(OTP_CACHE_KEY.format(phone=normalized_phone))
-        if user is not None:
-            account = AccountVerification.objects.get_or_create(user=user)[0]
-            account.mark_phone_verified()
-        return True
-    return False
+    result = check_otp(normalized_phone, str(user_input).strip(), user=user)
+    if result == VERIFIED and user is not None:
+        account = AccountVerification.objects.get_or_create(user=user)[0]
+        account.mark_phone_verified()
+    return result
@@ -0,0 +1,126 @@
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+
+from django.core.cache import cache
+
+PRICING_GENERATION_KEY = 'pricing:generation'
+
+_lock = threading.Lock()
+_snapshot = None
+_timeline = None
+
+
+@dataclass(frozen=True)
+class PricingSnapshot:
+    """Read-only copy of a PricingVersion row held in worker memory; ``id`` is the version id."""
+
+    id: int
+    exchange_rate: Decimal
+    transaction_fee_percent: Decimal
+    effective_from: Optional[datetime]
+    generation: int
+
+    def __str__(self):
+        return f"Pricing @ {self.exchange_rate} KSH/USDT ({self.transaction_fee_percent}% fee)"
+
+
+def _current_generation() -> int:
+    generation = cache.get(PRICING_GENERATION_KEY)
+    if generation is None:
+        # Seed with a timestamp so an evicted counter never rewinds to a value
+        # some worker already holds a stale snapshot for.
+        cache.add(PRICING_GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(PRICING_GENERATION_KEY)
+    return generation
+
+
+def bump_pricing_generation() -> int:
+    """Invalidate every worker's pricing snapshot."""
+    try:
+        return cache.incr(PRICING_GENERATION_KEY)
+    except ValueError:
+        generation = time.time_ns()
+        cache.set(PRICING_GENERATION_KEY, generation, timeout=None)
+        return generation
+
+
+def get_pricing() -> PricingSnapshot:
+    """Return the current pricing, hitting the database only after a generation bump."""
+    global _snapshot
+    generation = _current_generation()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation == generation:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is not None and snapshot.generation == generation:
+            return snapshot
+        from core.models import PricingVersion
+
+        snapshot = _to_snapshot(PricingVersion.in_force(), generation)
+        _snapshot = snapshot
+        return snapshot
+
+
+def _to_snapshot(version, generation):
+    return PricingSnapshot(
+        id=version.pk,
+        exchange_rate=version.exchange_rate,
+        transaction_fee_percent=version.transaction_fee_percent,
+        effective_from=version.effective_from,
+        generation=generation,
+    )
+
+
+@dataclass(frozen=True)
+class PricingTimeline:
+    """Every pricing version as an interval index, for resolving history without a query per row."""
+
+    starts: Tuple[datetime, ...]
+    versions: Tuple[PricingSnapshot, ...]
+    generation: int
+    by_id: Dict[int, PricingSnapshot] = field(default_factory=dict)
+
+    def at(self, moment) -> Optional[PricingSnapshot]:
+        """The version in force at ``moment``, or None if it predates every version."""
+        index = bisect_right(self.starts, moment) - 1
+        return self.versions[index] if index >= 0 else None
+
+    def resolve(self, version_id, moment) -> Optional[PricingSnapshot]:
+        """A transaction's recorded version, falling back to the one in force when it was created."""
+        if version_id is not None and version_id in self.by_id:
+            return self.by_id[version_id]
+        return self.at(moment)
+
+
+def get_pricing_timeline() -> PricingTimeline:
+    """All versions oldest first, reloaded (one query) only after a generation bump, like get_pricing."""
+    global _timeline
+    generation = _current_generation()
+    timeline = _timeline
+    if timeline is not None and timeline.generation == generation:
+        return timeline
+
+    with _lock:
+        timeline = _timeline
+        if timeline is not None and timeline.generation == generation:
+            return timeline
+        from core.models import PricingVersion
+
+        versions = tuple(
+            _to_snapshot(version, generation) for version in PricingVersion.objects.order_by('effective_from')
+        )
+        timeline = PricingTimeline(
+            starts=tuple(version.effective_from for version in versions),
+            versions=versions,
+            generation=generation,
+            by_id={version.id: version for version in versions},
+        )
+        _timeline = timeline
+        return timeline
@@ -0,0 +1,73 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db.models import Q
+
+_INVALID_USERNAME_CHARS = re.compile(r'[^\w.@+-]')
+USERNAME_MAX_LENGTH = User._meta.get_field('username').max_length
+
+# Below this many passwords the pool start-up costs more than it saves
+PARALLEL_HASH_THRESHOLD = 16
+# Passwords handed to a worker at a time; each hash takes tens of milliseconds, so small chunks balance well
+HASH_CHUNK_SIZE = 8
+
+
+def username_base(value):
+    """A valid username stem from an explicit username or the local part of an email address."""
+    base = _INVALID_USERNAME_CHARS.sub('', (value or '').split('@')[0]) or 'user'
+    # Leave room for a numeric suffix
+    return base[:USERNAME_MAX_LENGTH - 6]
+
+
+def unique_usernames(bases):
+    """Resolve a username for each base with a single prefix query, suffixing 1, 2, ... on clashes.
+
+    Clashes inside ``bases`` itself are resolved too, so the result can be bulk-inserted as is.
+    """
+    stems = set(bases)
+    if not stems:
+        return []
+    taken = set(
+        User.objects.filter(reduce(or_, (Q(username__startswith=stem) for stem in stems)))
+        .values_list('username', flat=True)
+    )
+    resolved = []
+    for base in bases:
+        candidate, counter = base, 1
+        while candidate in taken:
+            candidate = f'{base}{counter}'
+            counter += 1
+        taken.add(candidate)
+        resolved.append(candidate)
+    return resolved
+
+
+def _init_hash_worker(settings_module):
+    # Spawned workers (macOS, Windows) start without Django configured; forked ones inherit it
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    from django.apps import apps
+
+    if not apps.ready:
+        django.setup()
+
+
+def password_hasher_pool(workers=None):
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_hash_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'dust2cash.settings'),),
+    )
+
+
+def hash_passwords(passwords, pool=None):
+    """Hash passwords with the configured hasher, across ``pool`` when there are enough of them."""
+    passwords = list(passwords)
+    if pool is None or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    return list(pool.map(make_password, passwords, chunksize=HASH_CHUNK_SIZE))
@@ -0,0 +1,107 @@
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from typing import Optional
+
+from django.conf import settings
+from django.db import connections
+from django.urls import resolve
+
+logger = logging.getLogger('core.sql')
+
+DEFAULT_QUERY_BUDGET = 50
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LISTS = re.compile(r'\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalise a statement so N+1 repeats with different parameters compare equal."""
+    sql = _LITERALS.sub('?', sql)
+    sql = _IN_LISTS.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    total_ms: float = 0.0
+    slowest_sql: Optional[str] = None
+    slowest_ms: float = 0.0
+    fingerprints: Counter = field(default_factory=Counter)
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook: time every statement without needing DEBUG
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += elapsed
+            self.fingerprints[fingerprint(sql)] += 1
+            if elapsed >= self.slowest_ms:
+                self.slowest_ms = elapsed
+                self.slowest_sql = sql
+
+    @property
+    def duplicates(self):
+        return [(sql, n) for sql, n in self.fingerprints.most_common() if n > 1]
+
+    def summary(self):
+        top = '; '.join(f'{n}x {sql[:120]}' for sql, n in self.duplicates[:3]) or 'none'
+        return (
+            f'{self.count} queries in {self.total_ms:.1f} ms; duplicated: {top}; '
+            f'slowest {self.slowest_ms:.1f} ms: {(self.slowest_sql or "")[:200]}'
+        )
+
+
+@contextmanager
+def track_queries():
+    """Record every statement run on any database connection inside the block."""
+    stats = QueryStats()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(stats))
+        yield stats
+
+
+def get_query_budget(name):
+    """Budget for a URL name or Celery task name, from settings.SQL_QUERY_BUDGETS."""
+    budgets = getattr(settings, 'SQL_QUERY_BUDGETS', {})
+    return budgets.get(name, getattr(settings, 'SQL_QUERY_BUDGET_DEFAULT', DEFAULT_QUERY_BUDGET))
+
+
+def report_queries(kind, name, stats):
+    budget = get_query_budget(name)
+    if stats.count > budget:
+        logger.warning('%s %s over SQL budget (%d > %d): %s', kind, name, stats.count, budget, stats.summary())
+    else:
+        logger.debug('%s %s: %s', kind, name, stats.summary())
+
+
+@contextmanager
+def assert_query_budget(budget=None, *, name=None):
+    """Fail the enclosing test when the block runs more queries than allowed.
+
+    Pass an explicit ``budget`` or the ``name`` of a view/task declared in settings.SQL_QUERY_BUDGETS.
+    """
+    limit = budget if budget is not None else get_query_budget(name)
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        raise AssertionError(f'{name or "block"} exceeded its SQL budget ({stats.count} > {limit}): {stats.summary()}')
+
+
+def assert_view_within_budget(client, path, budget=None, **request_kwargs):
+    """GET ``path`` with a test client and fail if the view exceeds its declared budget."""
+    name = resolve(path.split('?', 1)[0]).url_name
+    with assert_query_budget(budget, name=name):
+        response = client.get(path, **request_kwargs)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    return response
@@ -0,0 +1,63 @@
+from dataclasses import asdict, dataclass
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Iterable, List
+
+CENT = Decimal('0.01')
+HUNDRED = Decimal('100')
+# Matches Transaction.amount: max_digits=10, decimal_places=2
+MAX_AMOUNT = Decimal('99999999.99')
+
+
+class InvalidAmount(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Quote:
+    """What a client receives for ``amount`` at one pricing revision, every figure rounded to the cent."""
+
+    amount: Decimal
+    exchange_rate: Decimal
+    gross: Decimal
+    fee: Decimal
+    net: Decimal
+
+    def as_dict(self):
+        return {key: str(value) for key, value in asdict(self).items()}
+
+
+def _cents(value):
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def parse_amount(raw):
+    """A positive amount with at most two decimal places, as accepted by TransactionForm."""
+    try:
+        amount = Decimal(str(raw).strip())
+    except (InvalidOperation, ValueError):
+        raise InvalidAmount(f'{raw!r} is not a number')
+    if not amount.is_finite() or amount <= 0 or amount > MAX_AMOUNT:
+        raise InvalidAmount(f'{raw!r} is out of range')
+    if amount != _cents(amount):
+        raise InvalidAmount(f'{raw!r} has more than two decimal places')
+    return _cents(amount)
+
+
+def quote_amounts(amounts: Iterable[Decimal], pricing) -> List[Quote]:
+    """Quote a batch of amounts against one pricing revision.
+
+    The fee is ``amount × rate × fee%``; gross and fee are each rounded half-up to the cent
+    and net is their difference, so the three figures always add up exactly.
+    """
+    rate = Decimal(pricing.exchange_rate)
+    fee_rate = rate * Decimal(pricing.transaction_fee_percent) / HUNDRED
+    quotes = []
+    for amount in amounts:
+        gross = _cents(amount * rate)
+        fee = _cents(amount * fee_rate)
+        quotes.append(Quote(amount=amount, exchange_rate=rate, gross=gross, fee=fee, net=gross - fee))
+    return quotes
+
+
+def quote_amount(amount: Decimal, pricing) -> Quote:
+    return quote_amounts([amount], pricing)[0]
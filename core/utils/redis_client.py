@@ -0,0 +1,15 @@
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """The process-wide client for REDIS_URL, or None when it is unset and callers use their local fallback."""
+    global _client
+    if not getattr(settings, 'REDIS_URL', None):
+        return None
+    if _client is None:
+        # redis-py's connection pool re-creates its sockets after a fork, so one client per process is safe
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
@@ -0,0 +1,97 @@
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.utils import timezone
+
+from core.console_counters import reconcile_counters
+from core.models import AgentProfile, AgentRequest, ClientProfile, Transaction
+
+SEED_PREFIX = 'bench-'
+
+
+def seed_dataset(*, transactions, clients, agents, requests=None, batch_size=10_000, seed=42):
+    """Bulk-insert a synthetic dataset for benchmarks and query-plan checks.
+
+    Every seeded username starts with ``SEED_PREFIX``. Agent requests are attached to
+    transactions that are still open; about 2% of them are left unaccepted and unexpired
+    so the agent queue has realistic depth. ``requests`` caps how many are created.
+    """
+    now = timezone.now()
+    users = User.objects.bulk_create(
+        [User(username=f'{SEED_PREFIX}client-{i}', password='!') for i in range(clients)]
+        + [User(username=f'{SEED_PREFIX}agent-{i}', password='!') for i in range(agents)],
+        batch_size=batch_size,
+    )
+    if not users or users[0].pk is None:
+        users = list(User.objects.filter(username__startswith=SEED_PREFIX).order_by('pk'))
+    client_users = [u for u in users if u.username.startswith(f'{SEED_PREFIX}client-')]
+    agent_users = [u for u in users if u.username.startswith(f'{SEED_PREFIX}agent-')]
+
+    ClientProfile.objects.bulk_create(
+        [
+            ClientProfile(user=u, first_name='Bench', last_name=str(i), email=f'{i}@bench.invalid', phone_number='0700000000')
+            for i, u in enumerate(client_users)
+        ],
+        batch_size=batch_size,
+    )
+    AgentProfile.objects.bulk_create(
+        [AgentProfile(user=u, is_online=i % 20 == 0) for i, u in enumerate(agent_users)],
+        batch_size=batch_size,
+    )
+    client_ids = list(ClientProfile.objects.filter(user__username__startswith=SEED_PREFIX).values_list('pk', flat=True))
+    agent_ids = list(AgentProfile.objects.filter(user__username__startswith=SEED_PREFIX).values_list('pk', flat=True))
+
+    statuses = [value for value, _ in Transaction.STATUS_CHOICES]
+    platforms = [value for value, _ in Transaction.PLATFORM_CHOICES]
+    rng = random.Random(seed)
+    for start in range(0, transactions, batch_size):
+        Transaction.objects.bulk_create([
+            Transaction(
+                client_id=rng.choice(client_ids),
+                agent_id=rng.choice(agent_ids) if rng.random() < 0.8 else None,
+                platform=rng.choice(platforms),
+                currency='usdt',
+                amount=Decimal(rng.randint(1, 500)),
+                amount_to_receive=Decimal(rng.randint(100, 60_000)),
+                payment_method='mpesa',
+                payment_phone='0700000000',
+                status=rng.choice(statuses),
+            )
+            for _ in range(min(batch_size, transactions - start))
+        ])
+    # auto_now_add ignores explicit values, so spread created_at over a year after the insert
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "UPDATE core_transaction SET created_at = now() - (random() * interval '365 days') "
+                "WHERE client_id = ANY(%s)",
+                [client_ids],
+            )
+
+    tx_ids = list(
+        Transaction.objects.filter(client_id__in=client_ids, status__in=['pending', 'agent_requested', 'cancelled'])
+        .values_list('pk', flat=True)[:requests]
+    )
+    agent_requests = []
+    for i, tx_id in enumerate(tx_ids):
+        settled = i % 50 != 0
+        agent_requests.append(AgentRequest(
+            transaction_id=tx_id,
+            expires_at=now + timedelta(minutes=rng.randint(-600, 15)),
+            is_accepted=settled and i % 2 == 0,
+            is_expired=settled and i % 2 == 1,
+        ))
+    AgentRequest.objects.bulk_create(agent_requests, batch_size=batch_size)
+    # bulk_create skips the signals that maintain the console counters
+    reconcile_counters(['clients', 'agents', 'transactions'])
+
+    return {
+        'client_ids': client_ids,
+        'agent_ids': agent_ids,
+        'requests': len(agent_requests),
+        'now': now,
+        'rng': rng,
+    }
@@ -0,0 +1,99 @@
+import threading
+import time
+from dataclasses import dataclass
+from typing import Sequence
+
+from .redis_client import get_redis
+
+# Refill every bucket in KEYS, then take one token from each only if all of them have one.
+# ARGV: now, then (capacity, refill per second) for each key. Returns {allowed, seconds to wait}.
+_TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[i * 2])
+  local rate = tonumber(ARGV[i * 2 + 1])
+  local state = redis.call('HMGET', key, 'tokens', 'ts')
+  local tokens = tonumber(state[1]) or capacity
+  local ts = tonumber(state[2]) or now
+  tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+  levels[i] = tokens
+  if tokens < 1 then
+    wait = math.max(wait, (1 - tokens) / rate)
+  end
+end
+if wait > 0 then
+  return {0, tostring(wait)}
+end
+for i, key in ipairs(KEYS) do
+  local capacity = tonumber(ARGV[i * 2])
+  local rate = tonumber(ARGV[i * 2 + 1])
+  redis.call('HSET', key, 'tokens', tostring(levels[i] - 1), 'ts', tostring(now))
+  redis.call('EXPIRE', key, math.ceil(capacity / rate) + 1)
+end
+return {1, '0'}
+"""
+
+_script = None
+# Process-local buckets for development without Redis: key -> (tokens, timestamp)
+_local_buckets = {}
+_local_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """``capacity`` requests in a burst, refilled evenly over ``period`` seconds."""
+
+    key: str
+    capacity: int
+    period: float
+
+    @property
+    def rate(self):
+        return self.capacity / self.period
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    retry_after: int
+
+
+def _take_script(client):
+    global _script
+    if _script is None:
+        _script = client.register_script(_TAKE_SCRIPT)
+    return _script
+
+
+def _take_local(buckets, now):
+    with _local_lock:
+        levels = []
+        wait = 0.0
+        for bucket in buckets:
+            tokens, ts = _local_buckets.get(bucket.key, (bucket.capacity, now))
+            tokens = min(bucket.capacity, tokens + max(0.0, now - ts) * bucket.rate)
+            levels.append(tokens)
+            if tokens < 1:
+                wait = max(wait, (1 - tokens) / bucket.rate)
+        if wait:
+            return False, wait
+        for bucket, tokens in zip(buckets, levels):
+            _local_buckets[bucket.key] = (tokens - 1, now)
+        return True, 0.0
+
+
+def take(buckets: Sequence[Bucket]) -> Decision:
+    """Take a token from every bucket atomically, or from none of them if any is empty."""
+    now = time.time()
+    client = get_redis()
+    if client is None:
+        allowed, wait = _take_local(buckets, now)
+    else:
+        args = [now]
+        for bucket in buckets:
+            args.extend([bucket.capacity, bucket.rate])
+        allowed, wait = _take_script(client)(keys=[bucket.key for bucket in buckets], args=args)
+        wait = float(wait)
+    return Decision(allowed=bool(allowed), retry_after=int(wait) + 1 if not allowed else 0)
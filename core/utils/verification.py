@@ -0,0 +1,19 @@
+from core.models import AccountVerification
+
+_REQUEST_CACHE_ATTR = '_account_verification'
+
+
+def get_account_verification(request):
+    """Return the user's AccountVerification, loading it at most once per request.
+
+    Users created before verification rows existed get an unsaved default instead of a write;
+    the backfill_account_verification command creates their rows.
+    """
+    if not request.user.is_authenticated:
+        return None
+    if not hasattr(request, _REQUEST_CACHE_ATTR):
+        verification = AccountVerification.objects.filter(user=request.user).first()
+        if verification is None:
+            verification = AccountVerification(user=request.user)
+        setattr(request, _REQUEST_CACHE_ATTR, verification)
+    return getattr(request, _REQUEST_CACHE_ATTR)
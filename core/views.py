@@ -6,49 +6,87 @@ from django.contrib import messages
 from django.utils import timezone
 from django.core.mail import send_mail, EmailMultiAlternatives
 from django.conf import settings
-from datetime import timedelta
+from datetime import datetime, timedelta
 from decimal import Decimal
 import csv
 import logging
-from django.http import HttpResponse, Http404, JsonResponse
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 from django.contrib.admin.views.decorators import staff_member_required
 from django.views.generic import TemplateView, ListView, CreateView, UpdateView, DeleteView, FormView
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
-from django.urls import reverse_lazy
+from django.urls import reverse, reverse_lazy
 from django.contrib.auth.models import User
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
-from django.utils.crypto import get_random_string
+from django.utils.crypto import constant_time_compare, get_random_string
 from django.db import transaction
-from django.db.models import Count, Q, Exists, OuterRef
+from django.db.models import Exists, OuterRef
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 from django.utils.html import strip_tags
-from .forms import LoginForm, SignUpForm, ClientProfileForm, TransactionForm, AgentApplicationForm, PricingSettingsForm, OTPForm, IDUploadForm, OTPRequestForm
-from .utils.africas_talking import send_otp, verify_otp
+from django.utils.dateparse import parse_date
+from asgiref.sync import sync_to_async
+from .forms import LoginForm, SignUpForm, ClientProfileForm, TransactionForm, AgentApplicationForm, PricingVersionForm, OTPForm, IDUploadForm, OTPRequestForm
+from .utils.africas_talking import verify_otp
+from .otp import EXPIRED, LOCKED, VERIFIED, request_otp
+from .utils.pricing import get_pricing, get_pricing_timeline
+from .utils.quotes import InvalidAmount, parse_amount, quote_amount, quote_amounts
+from .utils.verification import get_account_verification
+from .utils.provisioning import unique_usernames, username_base
+from .events import AGENT_CHANNEL, AVAILABILITY_CHANNEL, client_channel, events_enabled
+from .events import event_stream as stream_events
+from .dispatch import claim_request, dispatch_agent_request
+from .presence import any_agent_online, heartbeat, online_agents
+from .client_summary import HISTORY_FIELDS, client_history_page, get_client_summary
+from .console_counters import read_counters, verification_summary
+from .reporting import breakdown, daily_series, rollups_as_of
+from .sms_reports import (
+    InvalidDeliveryReport, buffer_delivery_report, delivery_rates_by_day, phone_delivery_history,
+)
+from .agent_queue import (
+    ACTIVE_STATUSES,
+    ACTIVE_TRANSACTIONS_LIMIT,
+    agent_transactions,
+    pending_request_count,
+    pending_request_page,
+    serialize_queue_item,
+)
 from .models import AccountVerification
 
 from .decorators import agent_required, client_required
-from .forms import LoginForm, SignUpForm, ClientProfileForm, TransactionForm, AgentApplicationForm, PricingSettingsForm
-from .tasks import send_payment_confirmation_task
+from .forms import LoginForm, SignUpForm, ClientProfileForm, TransactionForm, AgentApplicationForm, PricingVersionForm
+from .tasks import (
+    send_payment_confirmation_task,
+    notify_waiting_clients_task,
+    schedule_agent_request_expiry,
+)
 
 logger = logging.getLogger(__name__)
 
 try:
-    from services.email.sib_client import send_transactional_email, is_email_client_configured
+    from services.email.sib_client import send_transactional_email, send_transactional_emails, is_email_client_configured
 except Exception:
     send_transactional_email = None
+    send_transactional_emails = None
     is_email_client_configured = lambda: False
 
+from services.email import smtp_client
 
-def _fallback_send_mail(to_email, subject, html_content=None, text_content=None):
+
+def _build_fallback_message(to_email, subject, html_content=None, text_content=None):
     text_body = text_content or strip_tags(html_content or '')
     from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', 'support@michaelnganga.me')
     email = EmailMultiAlternatives(subject, text_body, from_email, [to_email])
     if html_content:
         email.attach_alternative(html_content, 'text/html')
-    email.send(fail_silently=False)
+    return email
+
+
+def _fallback_send_mail(to_email, subject, html_content=None, text_content=None):
+    smtp_client.send_messages([_build_fallback_message(to_email, subject, html_content, text_content)])
 
 
 def send_email_notification(*, to_email, subject, html_content=None, text_content=None):
@@ -76,13 +114,48 @@ def send_email_notification(*, to_email, subject, html_content=None, text_conten
         return False
 
 
+def send_email_notifications(notifications):
+    """Send several emails over one Brevo batch or one SMTP connection.
+
+    Each item takes the keyword arguments of send_email_notification. Returns True on success.
+    """
+    notifications = [item for item in notifications if item.get('to_email')]
+    if not notifications:
+        return False
+    try:
+        if send_transactional_emails:
+            send_transactional_emails([
+                {
+                    'to_email': item['to_email'],
+                    'subject': item['subject'],
+                    'html_content': item.get('html_content') or item.get('text_content') or '',
+                    'text_content': item.get('text_content'),
+                }
+                for item in notifications
+            ])
+        else:
+            smtp_client.send_messages([
+                _build_fallback_message(
+                    item['to_email'],
+                    item['subject'],
+                    item.get('html_content'),
+                    item.get('text_content'),
+                )
+                for item in notifications
+            ])
+        return True
+    except Exception:
+        logger.exception("Failed to send %d email(s)", len(notifications))
+        return False
+
+
 # Lazy-model loader to avoid importing Django models at module import time
 _models_loaded = False
-ClientProfile = AgentProfile = Transaction = AgentRequest = AdminProfile = AgentApplication = PricingSettings = None
+ClientProfile = AgentProfile = Transaction = AgentRequest = AdminProfile = AgentApplication = PricingVersion = None
 
 def ensure_models_loaded():
     """Import models when first needed to avoid AppRegistryNotReady during module import."""
-    global _models_loaded, ClientProfile, AgentProfile, Transaction, AgentRequest, AdminProfile, AgentApplication, PricingSettings
+    global _models_loaded, ClientProfile, AgentProfile, Transaction, AgentRequest, AdminProfile, AgentApplication, PricingVersion
     if _models_loaded:
         return
     from . import models as _models
@@ -92,7 +165,7 @@ def ensure_models_loaded():
     AgentRequest = _models.AgentRequest
     AdminProfile = _models.AdminProfile
     AgentApplication = _models.AgentApplication
-    PricingSettings = _models.PricingSettings
+    PricingVersion = _models.PricingVersion
     _models_loaded = True
 
 
@@ -103,7 +176,7 @@ def landing(request):
 
 def about_page(request):
     ensure_models_loaded()
-    active_agents = AgentProfile.objects.filter(is_online=True).select_related('user').order_by('user__first_name')
+    active_agents = online_agents().select_related('user').order_by('user__first_name')
     return render(request, 'about.html', {'active_agents': active_agents})
 
 
@@ -142,18 +215,6 @@ def contact_page(request):
             f"Preferred contact method: {contact_method}\n\nMessage:\n{message}"
         )
 
-        admin_sent = send_email_notification(
-            to_email=ADMIN_EMAIL,
-            subject="Dust2Cash Contact Form Submission",
-            html_content=admin_html,
-            text_content=text_body,
-        )
-        if not admin_sent:
-            messages.warning(
-                request,
-                'Message received, but we could not send the admin notification email.',
-            )
-
         # Auto-reply to user
         user_html = f"""
         <h3>Hi {name.split(' ')[0] if name else 'there'},</h3>
@@ -163,16 +224,25 @@ def contact_page(request):
         <br>
         <p>Best regards,<br>Michael Ng'ang'a</p>
         """
-        user_sent = send_email_notification(
-            to_email=email,
-            subject="We received your Dust2Cash inquiry",
-            html_content=user_html,
-            text_content=f"Hi {name or 'there'},\n\nThanks for contacting Dust2Cash. We'll respond shortly.\n\nMessage: {message}",
-        )
-        if not user_sent:
-            messages.info(
+        # Admin notification and auto-reply go out together over one connection
+        emails_sent = send_email_notifications([
+            {
+                'to_email': ADMIN_EMAIL,
+                'subject': "Dust2Cash Contact Form Submission",
+                'html_content': admin_html,
+                'text_content': text_body,
+            },
+            {
+                'to_email': email,
+                'subject': "We received your Dust2Cash inquiry",
+                'html_content': user_html,
+                'text_content': f"Hi {name or 'there'},\n\nThanks for contacting Dust2Cash. We'll respond shortly.\n\nMessage: {message}",
+            },
+        ])
+        if not emails_sent:
+            messages.warning(
                 request,
-                'We received your message, but the confirmation email could not be delivered.',
+                'Message received, but we could not send the notification and confirmation emails.',
             )
 
         messages.success(request, 'Thank you — your message has been sent. We\'ll reply shortly.')
@@ -271,7 +341,7 @@ def client_profile(request):
         profile = request.user.client_profile
     except ClientProfile.DoesNotExist:
         profile = ClientProfile.objects.create(user=request.user)
-    verification, _ = AccountVerification.objects.get_or_create(user=request.user)
+    verification = get_account_verification(request)
 
     form = ClientProfileForm(request.POST or None, instance=profile)
     if request.method == "POST" and form.is_valid():
@@ -293,18 +363,25 @@ def client_dashboard(request):
     except ClientProfile.DoesNotExist:
         messages.warning(request, 'Please complete your profile first')
         return redirect('client_profile')
-    verification, _ = AccountVerification.objects.get_or_create(user=request.user)
+    verification = get_account_verification(request)
 
-    agent_online = AgentProfile.objects.filter(is_online=True).exists()
+    agent_online = any_agent_online()
     
-    transactions = Transaction.objects.filter(client=profile).order_by('-created_at')
-    requestable_transaction = transactions.filter(status__in=['pending', 'agent_requested']).first()
+    history = client_history_page(profile, before=request.GET.get('before'))
+    requestable_transaction = (
+        Transaction.objects.filter(client=profile, status__in=['pending', 'agent_requested'])
+        .only(*HISTORY_FIELDS)
+        .order_by('-created_at', '-id')
+        .first()
+    )
 
-    pricing = PricingSettings.get_solo()
+    pricing = get_pricing()
     context = {
         'profile': profile,
         'agent_online': agent_online,
-        'transactions': transactions,
+        'transactions': history.items,
+        'next_cursor': history.next_cursor,
+        'summary': get_client_summary(profile),
         'requestable_transaction': requestable_transaction,
         'pricing': pricing,
         'account_verification': verification,
@@ -324,17 +401,18 @@ def create_transaction(request):
         messages.warning(request, 'Please complete your profile first')
         return redirect('client_profile')
 
-    active_agents = AgentProfile.objects.filter(is_online=True)
+    active_agents = online_agents()
 
     form = TransactionForm(request.POST or None, active_agents=active_agents)
-    pricing = PricingSettings.get_solo()
+    pricing = get_pricing()
     if request.method == "POST" and form.is_valid():
         transaction = form.save(commit=False)
         transaction.client = profile
-        transaction.exchange_rate = pricing.exchange_rate
-        fee_percent = pricing.transaction_fee_percent / Decimal('100')
-        transaction.transaction_fee = transaction.amount * fee_percent * Decimal(pricing.exchange_rate)
-        transaction.calculate_amount_to_receive()
+        quote = quote_amount(transaction.amount, pricing)
+        transaction.pricing_version_id = pricing.id
+        transaction.exchange_rate = quote.exchange_rate
+        transaction.transaction_fee = quote.fee
+        transaction.amount_to_receive = quote.net
         selected_agent = form.cleaned_data.get('agent')
 
         if selected_agent:
@@ -371,8 +449,9 @@ def request_agent(request, transaction_id):
         return redirect('client_dashboard')
 
     agent_request = getattr(transaction, 'agent_request', None)
-    if agent_request:
-        agent_request.check_expiry()
+    if agent_request and agent_request.is_lapsed():
+        # Reflect the lapse for this render only; expire_agent_request persists it
+        agent_request.is_expired = True
 
     if request.method == "POST":
         if agent_request and not agent_request.is_expired and not agent_request.is_accepted:
@@ -385,18 +464,24 @@ def request_agent(request, transaction_id):
             agent_request.expires_at = expires_at
             agent_request.is_expired = False
             agent_request.is_accepted = False
-            agent_request.save(update_fields=['requested_at', 'expires_at', 'is_expired', 'is_accepted'])
+            agent_request.offered_to = None
+            agent_request.offer_expires_at = None
+            agent_request.save(update_fields=[
+                'requested_at', 'expires_at', 'is_expired', 'is_accepted', 'offered_to', 'offer_expires_at',
+            ])
         else:
             agent_request = AgentRequest.objects.create(
                 transaction=transaction,
                 expires_at=expires_at
             )
+        schedule_agent_request_expiry(agent_request)
 
         transaction.status = 'agent_requested'
         transaction.request_timeout = expires_at
-        transaction.save(update_fields=['status', 'request_timeout'])
+        transaction.save(update_fields=['status', 'request_timeout', 'updated_at'])
 
-        send_notification_to_agent(transaction)
+        # Offers go to the least-loaded online agent first and escalate on timeout
+        dispatch_agent_request(agent_request)
 
         messages.success(request, 'Agent request sent! You have 15 minutes to wait for a response.')
         return redirect('client_dashboard')
@@ -428,57 +513,145 @@ def agent_portal(request):
         action = request.POST.get('action')
         if action == 'go_online':
             agent.go_online()
-            notify_waiting_clients(agent)
+            notify_waiting_clients_task.delay()
             messages.success(request, 'You are now online!')
         elif action == 'go_offline':
             agent.go_offline()
             messages.success(request, 'You are now offline')
     
-    pending_requests = AgentRequest.objects.filter(
-        is_accepted=False,
-        is_expired=False
-    ).select_related('transaction').order_by('-requested_at')
-    
-    active_transactions = Transaction.objects.filter(
-        agent=agent,
-        status__in=['agent_online', 'address_provided', 'crypto_received']
-    ).order_by('-created_at')
-    
-    completed_transactions = Transaction.objects.filter(
-        agent=agent,
-        status__in=['payment_sent', 'completed']
-    ).order_by('-created_at')[:10]
-    
+    queue = pending_request_page(agent=agent, after=request.GET.get('after'))
+    active_transactions = agent_transactions(agent, ACTIVE_STATUSES, ACTIVE_TRANSACTIONS_LIMIT)
+    completed_transactions = agent_transactions(agent, ['payment_sent', 'completed'], 10)
+
     context = {
         'agent': agent,
-        'pending_requests': pending_requests,
+        'pending_requests': queue.items,
+        'pending_count': pending_request_count(agent),
+        'next_cursor': queue.next_cursor,
         'active_transactions': active_transactions,
         'completed_transactions': completed_transactions,
     }
     return render(request, 'agent/portal.html', context)
 
 
+MAX_QUOTE_AMOUNTS = 50
+QUOTE_MAX_AGE = 365 * 24 * 60 * 60
+
+
+@never_cache
+def quote_redirect(request):
+    """Point calculators at the quote URL of the pricing revision in force right now."""
+    url = reverse('quote', args=[get_pricing().id])
+    query = request.GET.urlencode()
+    return redirect(f'{url}?{query}' if query else url)
+
+
+def quote(request, version):
+    """Quotes for one or more ``amount`` parameters at PricingVersion ``version``.
+
+    A version's quotes never change, so current-version responses may be cached by browsers
+    and proxies for a year. Superseded versions redirect (uncached) to the current one.
+    """
+    pricing = get_pricing()
+    if version != pricing.id:
+        return quote_redirect(request)
+    raw_amounts = request.GET.getlist('amount')
+    if not raw_amounts or len(raw_amounts) > MAX_QUOTE_AMOUNTS:
+        return JsonResponse({'error': f'Pass between 1 and {MAX_QUOTE_AMOUNTS} amount parameters'}, status=400)
+    try:
+        amounts = [parse_amount(raw) for raw in raw_amounts]
+    except InvalidAmount as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    response = JsonResponse({
+        'version': pricing.id,
+        'exchange_rate': str(pricing.exchange_rate),
+        'transaction_fee_percent': str(pricing.transaction_fee_percent),
+        'quotes': [item.as_dict() for item in quote_amounts(amounts, pricing)],
+    })
+    patch_cache_control(response, public=True, max_age=QUOTE_MAX_AGE, immutable=True)
+    return response
+
+
+@agent_required
+def agent_heartbeat(request):
+    """Keep an online agent in the presence set while their portal tab is open."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    agent = request.user.agent_profile
+    online = heartbeat(agent.pk)
+    if not online and agent.is_online:
+        # Presence lapsed (tab slept, or the set was reset); make the DB flag agree
+        agent.go_offline()
+    return JsonResponse({'online': online})
+
+
+@agent_required
+def agent_queue(request):
+    agent = request.user.agent_profile
+    page = pending_request_page(agent=agent, after=request.GET.get('after'))
+    return JsonResponse({
+        'results': [
+            dict(serialize_queue_item(item), accept_url=reverse('agent_accept_request', args=[item.id]))
+            for item in page.items
+        ],
+        'next_cursor': page.next_cursor,
+        'count': pending_request_count(agent),
+    })
+
+
+def _event_channels(user):
+    if not user.is_authenticated:
+        return None
+    channels = []
+    client = ClientProfile.objects.filter(user=user).only('id').first()
+    if client:
+        channels += [client_channel(client.id), AVAILABILITY_CHANNEL]
+    if AgentProfile.objects.filter(user=user).exists():
+        channels.append(AGENT_CHANNEL)
+    return channels
+
+
+async def event_stream(request):
+    """Server-Sent Events: status changes for a client's transactions, queue changes for agents.
+
+    Needs the ASGI entry point; under WSGI each open stream would pin a worker.
+    """
+    if not events_enabled():
+        # 204 tells EventSource to stop reconnecting; pages keep their manual refresh
+        return HttpResponse(status=204)
+    ensure_models_loaded()
+    channels = await sync_to_async(lambda: _event_channels(request.user))()
+    if channels is None:
+        return HttpResponse(status=401)
+    if not channels:
+        return HttpResponse(status=204)
+    response = StreamingHttpResponse(stream_events(channels), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @agent_required
 def agent_accept_request(request, request_id):
     ensure_models_loaded()
     agent = request.user.agent_profile
-    agent_request = get_object_or_404(AgentRequest, id=request_id)
-    
-    if not agent_request.check_expiry():
-        agent_request.is_accepted = True
-        agent_request.save()
-        
+    agent_request = get_object_or_404(AgentRequest.objects.select_related('transaction'), id=request_id)
+
+    if claim_request(agent_request.pk, agent):
+        # Only the winning claim gets here, so the transaction has a single writer
         transaction = agent_request.transaction
         transaction.agent = agent
         transaction.status = 'agent_online'
-        transaction.save()
-        
+        transaction.save(update_fields=['agent', 'status', 'updated_at'])
+
         send_agent_online_notification(transaction)
-        
+
         messages.success(request, 'Request accepted!')
-    else:
+    elif agent_request.is_lapsed():
         messages.warning(request, 'This request has expired')
-    
+    else:
+        messages.warning(request, 'This request was taken by or offered to another agent')
+
     return redirect('agent_portal')
 
 
@@ -532,79 +705,6 @@ def agent_send_payment(request, transaction_id):
     
     return render(request, 'agent/send_payment.html', {'transaction': transaction, 'agent': agent})
 
-def send_notification_to_agent(transaction):
-    try:
-        agents = AgentProfile.objects.all()
-        for agent in agents:
-            if agent.user.email:
-                message = f"""
-New Client Request on Dust2Cash
-
-A client needs assistance with a crypto conversion:
-
-Transaction Details:
-- Client: {transaction.client.first_name} {transaction.client.last_name}
-- Platform: {transaction.get_platform_display()}
-- Currency: {transaction.get_currency_display()}
-- Amount: {transaction.amount} {transaction.get_currency_display()}
-- Payment Method: {transaction.get_payment_method_display()}
-- Amount to Pay: KSH {transaction.amount_to_receive}
-
-The request will expire in 15 minutes if not accepted.
-
-To accept this request, please log in to the agent portal:
-https://dust2cash.com/agent/portal/
-
-Best regards,
-Dust2Cash Team
-"""
-                send_email_notification(
-                    to_email=agent.user.email,
-                    subject='New Client Request on Dust2Cash',
-                    text_content=message,
-                )
-    except Exception as e:
-        print(f"Error sending email: {e}")
-
-
-def notify_waiting_clients(agent):
-    pending_requests = AgentRequest.objects.filter(
-        is_accepted=False,
-        is_expired=False
-    )
-    
-    for agent_request in pending_requests:
-        transaction = agent_request.transaction
-        client_email = transaction.client.email
-        if client_email:
-            try:
-                message = f"""
-Agent is Now Online - Dust2Cash
-
-Good news! An agent has come online and is ready to assist with your transaction.
-
-Your Transaction:
-- Platform: {transaction.get_platform_display()}
-- Amount: {transaction.amount} {transaction.get_currency_display()}
-- To Receive: KSH {transaction.amount_to_receive}
-
-Please log in to your dashboard to check the status:
-https://dust2cash.com/client/dashboard/
-
-The agent will review your request shortly.
-
-Best regards,
-Dust2Cash Team
-"""
-                send_email_notification(
-                    to_email=client_email,
-                    subject='Agent is Now Online - Dust2Cash',
-                    text_content=message,
-                )
-            except Exception as e:
-                print(f"Error sending email: {e}")
-
-
 def send_agent_online_notification(transaction):
     client_email = transaction.client.email
     if client_email:
@@ -642,6 +742,32 @@ Dust2Cash Team
             print(f"Error sending email: {e}")
 
 
+def send_payment_confirmation(transaction):
+    client_email = transaction.client.email
+    if client_email:
+        message = f"""
+Payment Sent - Dust2Cash
+
+Your agent has sent your payment.
+
+Transaction Details:
+- Platform: {transaction.get_platform_display()}
+- Amount: {transaction.amount} {transaction.get_currency_display()}
+- Amount Sent: KSH {transaction.amount_to_receive}
+- Payment Method: {transaction.get_payment_method_display()} - {transaction.payment_phone}
+
+If you have not received it within a few minutes, please contact support.
+
+Best regards,
+Dust2Cash Team
+"""
+        send_email_notification(
+            to_email=client_email,
+            subject='Payment Sent - Dust2Cash',
+            text_content=message,
+        )
+
+
 @method_decorator(staff_member_required, name='dispatch')
 class AdminDashboardView(TemplateView):
     template_name = 'admin/dashboard.html'
@@ -649,15 +775,15 @@ class AdminDashboardView(TemplateView):
     def get_context_data(self, **kwargs):
         ensure_models_loaded()
         context = super().get_context_data(**kwargs)
-        verified_clients = AccountVerification.objects.filter(limits_unlocked=True).count()
+        counters = read_counters()
         context.update({
-            'client_count': ClientProfile.objects.count(),
-            'agent_count': AgentProfile.objects.count(),
-            'transaction_count': Transaction.objects.count(),
-            'reports_count': Transaction.objects.count(),
-            'verified_client_count': verified_clients,
-            'application_count': AgentApplication.objects.filter(status=AgentApplication.STATUS_PENDING).count(),
-            'pricing': PricingSettings.get_solo(),
+            'client_count': counters['clients'],
+            'agent_count': counters['agents'],
+            'transaction_count': counters['transactions'],
+            'reports_count': counters['transactions'],
+            'verified_client_count': counters['verified_accounts'],
+            'application_count': counters['pending_applications'],
+            'pricing': get_pricing(),
         })
         return context
 
@@ -672,7 +798,7 @@ class AdminClientListView(ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        qs = self.model.objects.all().select_related('user').annotate(
+        qs = self.model.objects.all().select_related('user__accountverification').annotate(
             is_verified=Exists(
                 AccountVerification.objects.filter(user=OuterRef('user_id'), limits_unlocked=True)
             )
@@ -687,10 +813,7 @@ class AdminClientListView(ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['active_filter'] = self.request.GET.get('verification', '')
-        context['verified_summary'] = AccountVerification.objects.aggregate(
-            verified=Count('id', filter=Q(limits_unlocked=True)),
-            pending=Count('id', filter=Q(limits_unlocked=False))
-        )
+        context['verified_summary'] = verification_summary(read_counters())
         return context
 
 
@@ -706,12 +829,7 @@ class AdminClientCreateView(CreateView):
 
     def form_valid(self, form):
         email = form.cleaned_data['email']
-        base_username = email.split('@')[0]
-        username = base_username
-        counter = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{counter}"
-            counter += 1
+        username = unique_usernames([username_base(email)])[0]
         user = User.objects.create_user(
             username=username,
             email=email,
@@ -768,7 +886,7 @@ class AdminAgentListView(ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return self.model.objects.all()
+        return self.model.objects.select_related('user')
 
 
 class AdminAgentCreateView(CreateView):
@@ -824,7 +942,7 @@ class AdminTransactionListView(ListView):
         return super().dispatch(request, *args, **kwargs)
 
     def get_queryset(self):
-        return self.model.objects.order_by('-created_at')
+        return self.model.objects.select_related('client', 'agent__user').order_by('-created_at')
 
 
 class AdminTransactionUpdateView(UpdateView):
@@ -850,10 +968,48 @@ class AdminTransactionDeleteView(DeleteView):
 
 class AdminReportsView(TemplateView):
     template_name = 'admin/reports.html'
+    PERIODS = (7, 30, 90)
+    BREAKDOWNS = (
+        ('platform', 'By platform'),
+        ('currency', 'By currency'),
+        ('payment_method', 'By payment method'),
+        ('status', 'By status'),
+    )
 
     def get_context_data(self, **kwargs):
         ensure_models_loaded()
         context = super().get_context_data(**kwargs)
+        try:
+            period = int(self.request.GET.get('period', 30))
+        except ValueError:
+            period = 30
+        if period not in self.PERIODS:
+            period = 30
+        until = timezone.localdate()
+        since = until - timedelta(days=period - 1)
+        # Analytics come from the daily rollups only; Transaction is never scanned here
+        series = daily_series(since, until)
+        context.update({
+            'period': period,
+            'periods': self.PERIODS,
+            'daily_series': series,
+            'period_totals': {
+                'count': sum(point.count for point in series),
+                'amount': sum(point.amount for point in series),
+                'receive': sum(point.receive for point in series),
+            },
+            'breakdowns': [(title, breakdown(dimension, since, until)) for dimension, title in self.BREAKDOWNS],
+            'agent_breakdown': breakdown('agent', since, until, limit=10),
+            'rollups_as_of': rollups_as_of(),
+            'sms_delivery_rates': delivery_rates_by_day(since),
+        })
+        sms_phone = (self.request.GET.get('sms_phone') or '').strip()
+        if sms_phone:
+            try:
+                phone, reports, rate = phone_delivery_history(sms_phone)
+                context['sms_lookup'] = {'phone': phone, 'reports': reports, 'rate': rate}
+            except ValueError as exc:
+                context['sms_lookup'] = {'phone': sms_phone, 'error': str(exc)}
         clients = ClientProfile.objects.select_related('user').order_by('-created_at')[:25]
         agents = AgentProfile.objects.select_related('user').order_by('-last_online')[:25]
         transactions_qs = Transaction.objects.select_related('client__user', 'agent__user').order_by('-created_at')
@@ -873,10 +1029,7 @@ class AdminReportsView(TemplateView):
                 'status': status_filter,
                 'platform': platform_filter,
             },
-            'verified_summary': AccountVerification.objects.aggregate(
-                verified=Count('id', filter=Q(limits_unlocked=True)),
-                pending=Count('id', filter=Q(limits_unlocked=False)),
-            ),
+            'verified_summary': verification_summary(read_counters()),
         })
         return context
 
@@ -941,49 +1094,135 @@ class AdminApplicationCreateUserView(FormView):
 @login_required
 @staff_member_required
 def admin_pricing_settings(request):
-    pricing = PricingSettings.get_solo()
-    form = PricingSettingsForm(request.POST or None, instance=pricing)
+    ensure_models_loaded()
+    pricing = PricingVersion.in_force()
+    # Saving always appends a new version; the current one only pre-fills the form
+    form = PricingVersionForm(request.POST or None, initial={
+        'exchange_rate': pricing.exchange_rate,
+        'transaction_fee_percent': pricing.transaction_fee_percent,
+    })
     if request.method == "POST" and form.is_valid():
-        updated_pricing = form.save(commit=False)
+        new_version = form.save(commit=False)
         if request.user.is_authenticated:
-            updated_pricing.updated_by = request.user
-        updated_pricing.save()
+            new_version.created_by = request.user
+        new_version.save()
         messages.success(request, 'Pricing settings updated successfully.')
         return redirect('admin_pricing_settings')
-    return render(request, 'admin/pricing_settings.html', {'form': form, 'pricing': pricing})
+    return render(request, 'admin/pricing_settings.html', {
+        'form': form,
+        'pricing': pricing,
+        'pricing_history': PricingVersion.objects.select_related('created_by')[:10],
+    })
+
+
+# Rows fetched per database round-trip while streaming exports
+EXPORT_CHUNK_SIZE = 2000
+
+
+class _Echo:
+    """Pseudo-buffer: csv.writer hands each formatted row straight back to the generator."""
+
+    def write(self, value):
+        return value
+
+
+def _stream_csv(filename, header, rows):
+    writer = csv.writer(_Echo())
+
+    def generate():
+        yield writer.writerow(header)
+        for row in rows:
+            yield writer.writerow(row)
+
+    response = StreamingHttpResponse(generate(), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def _parse_date_param(value):
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+def _filter_created_range(request, qs):
+    """Apply optional ?start=YYYY-MM-DD&end=YYYY-MM-DD bounds as an index-friendly range."""
+    start = _parse_date_param(request.GET.get('start'))
+    end = _parse_date_param(request.GET.get('end'))
+    if start:
+        qs = qs.filter(created_at__gte=timezone.make_aware(datetime.combine(start, datetime.min.time())))
+    if end:
+        qs = qs.filter(created_at__lt=timezone.make_aware(datetime.combine(end + timedelta(days=1), datetime.min.time())))
+    return qs
 
 
 @staff_member_required
 def export_clients_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="clients.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['First Name', 'Last Name', 'Email', 'Phone', 'Created'])
-    for client in ClientProfile.objects.all():
-        writer.writerow([client.first_name, client.last_name, client.email, client.phone_number, client.created_at])
-    return response
+    ensure_models_loaded()
+    rows = _filter_created_range(request, ClientProfile.objects.order_by('pk')).values_list(
+        'first_name', 'last_name', 'email', 'phone_number', 'created_at',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return _stream_csv('clients.csv', ['First Name', 'Last Name', 'Email', 'Phone', 'Created'], rows)
 
 
 @staff_member_required
 def export_agents_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="agents.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['Username', 'Email', 'Online', 'Last Online'])
-    for agent in AgentProfile.objects.select_related('user'):
-        writer.writerow([agent.user.username, agent.user.email, agent.is_online, agent.last_online])
-    return response
+    ensure_models_loaded()
+    qs = _filter_created_range(request, AgentProfile.objects.order_by('pk'))
+    online = request.GET.get('online')
+    if online in ('0', '1'):
+        qs = qs.filter(is_online=online == '1')
+    rows = qs.values_list(
+        'user__username', 'user__email', 'is_online', 'last_online',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    return _stream_csv('agents.csv', ['Username', 'Email', 'Online', 'Last Online'], rows)
 
 
 @staff_member_required
 def export_transactions_csv(request):
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="transactions.csv"'
-    writer = csv.writer(response)
-    writer.writerow(['ID', 'Client', 'Agent', 'Amount', 'Currency', 'Status', 'Created'])
-    for tx in Transaction.objects.select_related('client', 'agent'):
-        writer.writerow([tx.id, str(tx.client), str(tx.agent) if tx.agent else '', tx.amount, tx.get_currency_display(), tx.get_status_display(), tx.created_at])
-    return response
+    ensure_models_loaded()
+    qs = _filter_created_range(request, Transaction.objects.order_by('pk'))
+    status_filter = request.GET.get('status')
+    platform_filter = request.GET.get('platform')
+    if status_filter:
+        qs = qs.filter(status=status_filter)
+    if platform_filter:
+        qs = qs.filter(platform=platform_filter)
+    currencies = dict(Transaction.CURRENCY_CHOICES)
+    statuses = dict(Transaction.STATUS_CHOICES)
+    # Pricing versions come from the in-memory interval index, not a join or a query per row
+    timeline = get_pricing_timeline()
+    # One joined pass; mirrors str(ClientProfile) and str(AgentProfile) without loading models.
+    values = qs.values_list(
+        'id', 'client__first_name', 'client__last_name', 'client__phone_number',
+        'agent__user__username', 'amount', 'currency', 'status', 'created_at',
+        'exchange_rate', 'transaction_fee', 'pricing_version_id',
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def to_row(tx_id, first_name, last_name, phone_number, agent_username, amount, currency, status, created_at,
+               exchange_rate, transaction_fee, pricing_version_id):
+        version = timeline.resolve(pricing_version_id, created_at)
+        return [
+            tx_id,
+            f"{first_name} {last_name} ({phone_number})",
+            f"Agent: {agent_username}" if agent_username else '',
+            amount,
+            currencies.get(currency, currency),
+            statuses.get(status, status),
+            created_at,
+            exchange_rate,
+            transaction_fee,
+            version.transaction_fee_percent if version else '',
+            version.id if version else '',
+        ]
+
+    return _stream_csv(
+        'transactions.csv',
+        ['ID', 'Client', 'Agent', 'Amount', 'Currency', 'Status', 'Created',
+         'Exchange Rate', 'Fee', 'Fee %', 'Pricing Version'],
+        (to_row(*value) for value in values),
+    )
 
 
 def apply_agent(request):
@@ -1027,11 +1266,8 @@ def admin_application_verify(request, pk):
     last_name = ' '.join(names[1:]) if len(names) > 1 else ''
     password = None
     if not application.created_user:
-        base_username = application.email.split('@')[0]
-        candidate = base_username
+        candidate = unique_usernames([username_base(application.email)])[0]
         UserModel = get_user_model()
-        while UserModel.objects.filter(username=candidate).exists():
-            candidate = f"{base_username}{get_random_string(4)}"
         password = get_random_string(12)
         with transaction.atomic():
             user = UserModel.objects.create_user(
@@ -1163,19 +1399,27 @@ def agent_interactions(request):
     return render(request, 'agent/interactions.html', context)
 
 
+def _otp_throttled_message(otp_request):
+    return f'Too many code requests for this number. Try again in {otp_request.retry_after} seconds.'
+
+
 @login_required
 def request_otp_view(request):
     form = OTPRequestForm(request.POST or None)
     if request.method == "POST" and form.is_valid():
         phone = form.cleaned_data['phone_number']
         try:
-            send_otp(phone)
-            messages.success(request, "OTP sent successfully")
-            return redirect("verify_otp")
+            otp_request = request_otp(phone, user=request.user)
         except ValueError as exc:
             form.add_error('phone_number', str(exc))
         except Exception:
+            logger.exception('Could not queue OTP for %s', phone)
             messages.error(request, 'We could not send the OTP right now. Please try again in a moment.')
+        else:
+            if otp_request.accepted:
+                messages.success(request, "OTP sent successfully")
+                return redirect("verify_otp")
+            form.add_error('phone_number', _otp_throttled_message(otp_request))
     return render(request, "auth/request_otp.html", {'form': form})
 
 
@@ -1186,9 +1430,14 @@ def verify_otp_view(request):
         if form.is_valid():
             phone = form.cleaned_data["phone_number"]
             otp = form.cleaned_data["otp"]
-            if verify_otp(phone, otp, user=request.user):
+            result = verify_otp(phone, otp, user=request.user)
+            if result == VERIFIED:
                 messages.success(request, "Phone verified successfully!")
                 return redirect("client_dashboard")
+            elif result == LOCKED:
+                messages.error(request, "Too many incorrect codes. Please wait before requesting a new one.")
+            elif result == EXPIRED:
+                messages.error(request, "That code has expired. Request a new one.")
             else:
                 messages.error(request, "Invalid OTP. Try again.")
     else:
@@ -1198,10 +1447,15 @@ def verify_otp_view(request):
 
 @login_required
 def upload_id_view(request):
-    verification, _ = AccountVerification.objects.get_or_create(user=request.user)
+    verification = get_account_verification(request)
     form = IDUploadForm(request.POST or None, request.FILES or None, instance=verification)
     if request.method == 'POST' and form.is_valid():
-        form.save(user=request.user)
+        if verification.pk is None:
+            # Accounts that predate verification rows only have an unsaved default; create the row now.
+            form.save(user=request.user)
+        else:
+            # The form is bound to the memoized row, so save it in place instead of re-fetching.
+            form.save()
         messages.success(request, 'Government ID uploaded successfully!')
         return redirect('client_dashboard')
     return render(request, 'auth/upload_id.html', {'form': form, 'account_verification': verification})
@@ -1209,8 +1463,19 @@ def upload_id_view(request):
 
 @csrf_exempt
 def sms_delivery_report(request):
-    data = request.POST.dict() if request.method == 'POST' else {}
-    logger.info('Africa\'s Talking delivery report: %s', data)
+    """Africa's Talking delivery callback: buffered in Redis and written in bulk by flush_sms_delivery_reports."""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST required'}, status=405)
+    token = getattr(settings, 'SMS_DELIVERY_CALLBACK_TOKEN', '')
+    if token and not constant_time_compare(request.GET.get('token', ''), token):
+        return JsonResponse({'error': 'Forbidden'}, status=403)
+    try:
+        buffered = buffer_delivery_report(request.POST)
+    except InvalidDeliveryReport as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    if not buffered:
+        # Africa's Talking retries failed callbacks, so a full buffer defers the report instead of losing it
+        return JsonResponse({'error': 'Busy, retry later'}, status=503)
     return JsonResponse({'status': 'ok'})
 
 
@@ -1223,12 +1488,16 @@ def verify_phone_view(request):
             messages.error(request, 'Enter the phone number linked to your account.')
             return render(request, template)
         try:
-            send_otp(phone)
-            request.session['otp_phone'] = phone
-            messages.success(request, 'OTP sent successfully.')
-            return redirect('verify_otp')
+            otp_request = request_otp(phone, user=request.user)
         except ValueError as exc:
             messages.error(request, str(exc))
         except Exception:
+            logger.exception('Could not queue OTP for %s', phone)
             messages.error(request, 'Could not send OTP. Try again in a moment.')
+        else:
+            if otp_request.accepted:
+                request.session['otp_phone'] = phone
+                messages.success(request, 'OTP sent successfully.')
+                return redirect('verify_otp')
+            messages.error(request, _otp_throttled_message(otp_request))
     return render(request, template)
@@ -31,6 +31,7 @@ _USE_WHITENOISE = importlib.util.find_spec('whitenoise') is not None
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.QueryBudgetMiddleware',
     # WhiteNoise will be inserted below only if installed
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -129,14 +130,116 @@ ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', 'support@michaelnganga.me')
 # Default from email used by send_mail when no from_email provided
 DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', SIB_SENDER_EMAIL or 'support@michaelnganga.me')
 
+# Shared cache: Redis when REDIS_URL is set so every worker sees the same keys
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
 # Celery / Redis configuration
-CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+CELERY_BROKER_URL = REDIS_URL or 'redis://localhost:6379/0'
 CELERY_RESULT_BACKEND = CELERY_BROKER_URL
+# OTPs get their own queue and worker (see Procfile) so they never wait behind bulk work
+CELERY_TASK_ROUTES = {
+    'core.tasks.send_otp_task': {'queue': 'otp'},
+}
 CELERY_BEAT_SCHEDULE = {
-    'expire-agent-requests-every-15-minutes': {
+    # Safety net only: each request is expired on time by its own ETA task
+    'reconcile-agent-request-expiry-every-5-minutes': {
         'task': 'core.tasks.expire_agent_requests',
-        'schedule': crontab(minute='*/15'),
+        'schedule': crontab(minute='*/5'),
+    },
+    'sync-agent-presence-every-minute': {
+        'task': 'core.tasks.sync_agent_presence',
+        'schedule': crontab(minute='*'),
     },
+    # Counters are kept exact by signals; this only catches raw SQL and bulk writes that skip them
+    'reconcile-console-counters-hourly': {
+        'task': 'core.tasks.reconcile_console_counters',
+        'schedule': crontab(minute=17),
+    },
+    'refresh-transaction-rollups-every-5-minutes': {
+        'task': 'core.tasks.refresh_transaction_rollups',
+        'schedule': crontab(minute='*/5'),
+    },
+    'flush-sms-delivery-reports-every-minute': {
+        'task': 'core.tasks.flush_sms_delivery_reports',
+        'schedule': crontab(minute='*'),
+    },
+}
+
+# The report rollups only consume transaction changes older than this, leaving time for slow commits
+REPORT_ROLLUP_LAG_SECONDS = int(os.getenv('REPORT_ROLLUP_LAG_SECONDS', '120'))
+
+# Text online agents about new requests as well as emailing them
+AGENT_SMS_ALERTS_ENABLED = os.getenv('AGENT_SMS_ALERTS_ENABLED', 'True').lower() in ('1', 'true', 'yes')
+
+# Africa's Talking delivery callbacks: shared secret required as ?token= on the callback URL when set,
+# and the most reports the Redis buffer holds between flushes before the webhook refuses more
+SMS_DELIVERY_CALLBACK_TOKEN = os.getenv('AFRICAS_TALKING_CALLBACK_TOKEN', '')
+SMS_DELIVERY_BUFFER_MAX = int(os.getenv('SMS_DELIVERY_BUFFER_MAX', '100000'))
+
+# OTP codes: lifetime, wrong guesses allowed per user and phone, how long that user is locked out of the
+# phone after that, and wrong guesses from anyone before a code is burned
+OTP_TTL_SECONDS = int(os.getenv('OTP_TTL_SECONDS', '300'))
+OTP_MAX_ATTEMPTS = int(os.getenv('OTP_MAX_ATTEMPTS', '5'))
+OTP_LOCKOUT_SECONDS = int(os.getenv('OTP_LOCKOUT_SECONDS', '900'))
+OTP_MAX_CODE_GUESSES = int(os.getenv('OTP_MAX_CODE_GUESSES', '15'))
+
+# OTP token buckets as (burst capacity, seconds to refill it completely)
+OTP_THROTTLE_PER_PHONE = (
+    int(os.getenv('OTP_THROTTLE_PHONE_BURST', '3')),
+    int(os.getenv('OTP_THROTTLE_PHONE_PERIOD', '600')),
+)
+OTP_THROTTLE_PER_USER = (
+    int(os.getenv('OTP_THROTTLE_USER_BURST', '5')),
+    int(os.getenv('OTP_THROTTLE_USER_PERIOD', '3600')),
+)
+
+# Agents drop offline when the portal has not sent a heartbeat for this long
+AGENT_PRESENCE_TTL_SECONDS = int(os.getenv('AGENT_PRESENCE_TTL_SECONDS', '90'))
+
+# How long one agent holds an offered request before it escalates to the next least-loaded agent
+AGENT_OFFER_TIMEOUT_SECONDS = int(os.getenv('AGENT_OFFER_TIMEOUT_SECONDS', '60'))
+
+# Per-view and per-task SQL budgets; going over logs a warning on the core.sql logger.
+# Keys are URL names from core/urls.py or Celery task names.
+# Tracking times and fingerprints every statement, so it is on with DEBUG only; set
+# SQL_QUERY_BUDGET_ENABLED=true to turn it on in production while investigating a slow path.
+SQL_QUERY_BUDGET_ENABLED = os.getenv('SQL_QUERY_BUDGET_ENABLED', str(DEBUG)).lower() in ('1', 'true', 'yes')
+SQL_QUERY_BUDGET_DEFAULT = int(os.getenv('SQL_QUERY_BUDGET_DEFAULT', '50'))
+SQL_QUERY_BUDGETS = {
+    'client_dashboard': 12,
+    'create_transaction': 12,
+    'agent_portal': 10,
+    'agent_queue': 6,
+    'admin_dashboard': 10,
+    'admin_clients': 8,
+    'admin_agents': 8,
+    'admin_transactions': 8,
+    'admin_reports': 18,
+    'export_clients_csv': 5,
+    'export_agents_csv': 5,
+    'export_transactions_csv': 5,
+    'core.tasks.notify_agents_of_request_task': 5,
+    'core.tasks.notify_waiting_clients_task': 5,
+    'core.tasks.expire_agent_request': 10,
+    'core.tasks.expire_agent_requests': 10,
+    'core.tasks.escalate_agent_offer': 10,
+    'core.tasks.sync_agent_presence': 5,
+    'core.tasks.reconcile_console_counters': 25,
+    'core.tasks.refresh_transaction_rollups': 60,
+    'core.tasks.flush_sms_delivery_reports': 60,
 }
 
 # put near end of settings.py
@@ -1,6 +1,7 @@
 import os
 import logging
-from typing import Optional
+import threading
+from typing import Iterable, List, Optional
 
 import sib_api_v3_sdk
 from sib_api_v3_sdk.rest import ApiException
@@ -9,6 +10,8 @@ from sib_api_v3_sdk import (
     SendSmtpEmail,
     SendSmtpEmailSender,
     SendSmtpEmailTo,
+    SendSmtpEmailTo1,
+    SendSmtpEmailMessageVersions,
 )
 
 
@@ -21,16 +24,46 @@ SIB_SENDER_NAME = os.getenv('SIB_SENDER_NAME') or os.getenv('BREVO_SENDER_NAME')
 
 logger = logging.getLogger(__name__)
 
+# Brevo accepts at most this many message versions in one send_transac_email call
+MAX_MESSAGE_VERSIONS = 1000
+# Keep-alive connections held by the shared urllib3 pool in each process
+SIB_POOL_MAXSIZE = int(os.getenv('SIB_POOL_MAXSIZE', '4'))
+
+_api = None
+_api_pid = None
+_api_lock = threading.Lock()
+
 if not SIB_API_KEY:
     # We don't raise at import time to allow local dev without SIB configured; functions will raise if used.
     pass
 
 
+def _reset_api_client():
+    # Sockets inherited from the parent must not be shared, so a forked child starts clean.
+    global _api, _api_pid
+    _api = None
+    _api_pid = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_api_client)
+
+
 def _get_api_client():
-    configuration = sib_api_v3_sdk.Configuration()
-    configuration.api_key['api-key'] = SIB_API_KEY
-    api_client = sib_api_v3_sdk.ApiClient(configuration)
-    return TransactionalEmailsApi(api_client)
+    """Return the process-wide API client, building it on first use after start or fork."""
+    global _api, _api_pid
+    pid = os.getpid()
+    if _api is not None and _api_pid == pid:
+        return _api
+    with _api_lock:
+        if _api is None or _api_pid != pid:
+            configuration = sib_api_v3_sdk.Configuration()
+            configuration.api_key['api-key'] = SIB_API_KEY
+            configuration.connection_pool_maxsize = SIB_POOL_MAXSIZE
+            api_client = sib_api_v3_sdk.ApiClient(configuration)
+            _api = TransactionalEmailsApi(api_client)
+            _api_pid = pid
+    return _api
 
 
 def is_email_client_configured() -> bool:
@@ -81,4 +114,100 @@ def send_transactional_email(
         raise RuntimeError(f"Sendinblue API error: {e}")
 
 
-__all__ = ['send_transactional_email', 'is_email_client_configured']
+def send_transactional_email_batch(
+    recipients: Iterable[dict],
+    subject: str,
+    html_content: str,
+    *,
+    sender_email: Optional[str] = None,
+    sender_name: Optional[str] = None,
+    text_content: Optional[str] = None,
+) -> List[dict]:
+    """Send one rendered email to many recipients using Brevo message versions.
+
+    Each recipient is a dict with ``email`` and optional ``name``, ``params`` and ``subject``;
+    the content may reference ``{{ params.<key> }}`` and Brevo substitutes the per-recipient values.
+    One API call is made per MAX_MESSAGE_VERSIONS recipients. Returns the API responses.
+    """
+    if not SIB_API_KEY:
+        raise RuntimeError("SIB_API_KEY (BREVO_API_KEY) environment variable is not set")
+
+    sender_email = sender_email or SIB_SENDER_EMAIL
+    sender_name = sender_name or SIB_SENDER_NAME or 'Dust2Cash'
+    if not sender_email:
+        raise RuntimeError("Sender email not configured: set SIB_SENDER_EMAIL or BREVO_SENDER_EMAIL")
+
+    versions = [
+        SendSmtpEmailMessageVersions(
+            to=[SendSmtpEmailTo1(email=recipient['email'], name=recipient.get('name') or None)],
+            params=recipient.get('params') or None,
+            subject=recipient.get('subject') or None,
+        )
+        for recipient in recipients
+        if recipient.get('email')
+    ]
+    if not versions:
+        return []
+
+    api = _get_api_client()
+    sender = SendSmtpEmailSender(name=sender_name, email=sender_email)
+    results = []
+    for start in range(0, len(versions), MAX_MESSAGE_VERSIONS):
+        message = SendSmtpEmail(
+            sender=sender,
+            subject=subject,
+            html_content=html_content,
+            text_content=text_content,
+            message_versions=versions[start:start + MAX_MESSAGE_VERSIONS],
+        )
+        try:
+            result = api.send_transac_email(message)
+            results.append(result.to_dict() if hasattr(result, 'to_dict') else result)
+        except ApiException as e:
+            logger.exception("Sendinblue API error when sending batch '%s'", subject)
+            raise RuntimeError(f"Sendinblue API error: {e}")
+    return results
+
+
+def send_transactional_emails(
+    messages: Iterable[dict],
+    *,
+    sender_email: Optional[str] = None,
+    sender_name: Optional[str] = None,
+) -> List[dict]:
+    """Send several transactional emails in as few API calls as possible.
+
+    Each message is a dict with ``to_email``, ``subject``, ``html_content`` and optional
+    ``text_content``/``to_name``. Messages sharing the same body go out as one batch call;
+    the rest reuse the pooled keep-alive connection. Returns the API responses.
+    """
+    groups = {}
+    for message in messages:
+        if not message.get('to_email'):
+            continue
+        key = (message.get('html_content') or '', message.get('text_content'))
+        groups.setdefault(key, []).append({
+            'email': message['to_email'],
+            'name': message.get('to_name'),
+            'subject': message['subject'],
+        })
+
+    results = []
+    for (html_content, text_content), recipients in groups.items():
+        results.extend(send_transactional_email_batch(
+            recipients,
+            recipients[0]['subject'],
+            html_content,
+            sender_email=sender_email,
+            sender_name=sender_name,
+            text_content=text_content,
+        ))
+    return results
+
+
+__all__ = [
+    'send_transactional_email',
+    'send_transactional_email_batch',
+    'send_transactional_emails',
+    'is_email_client_configured',
+]
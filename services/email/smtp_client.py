@@ -0,0 +1,88 @@
+import os
+import logging
+import smtplib
+import threading
+import time
+from typing import Iterable
+
+from django.core.mail import get_connection
+
+
+# Long-lived connection for Django's mail backend, used when Brevo is unavailable.
+# Each worker process keeps one open connection and reuses it across messages.
+
+SMTP_IDLE_TIMEOUT = int(os.getenv('SMTP_IDLE_TIMEOUT', '60'))
+
+logger = logging.getLogger(__name__)
+
+_connection = None
+_connection_pid = None
+_last_used = 0.0
+_lock = threading.Lock()
+
+
+def _reset_connection():
+    # Drop, never close, a connection inherited across fork: the socket belongs to the parent.
+    global _connection, _connection_pid
+    _connection = None
+    _connection_pid = None
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_connection)
+
+
+def _close_connection():
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            logger.debug('Ignoring error while closing SMTP connection', exc_info=True)
+    _connection = None
+
+
+def _open_connection():
+    global _connection, _connection_pid
+    _connection = get_connection(fail_silently=False)
+    _connection.open()
+    _connection_pid = os.getpid()
+    return _connection
+
+
+def send_messages(messages: Iterable) -> int:
+    """Send EmailMessage objects over the shared connection, reconnecting once if it dropped.
+
+    Messages go one at a time over the same session, so after a reconnect only the message that
+    failed and those after it are sent again; earlier ones are never duplicated.
+    """
+    global _last_used
+    messages = list(messages)
+    if not messages:
+        return 0
+    with _lock:
+        if _connection_pid != os.getpid():
+            _reset_connection()
+        # Servers drop idle sessions; reconnect proactively rather than fail the first send.
+        if _connection is not None and time.monotonic() - _last_used > SMTP_IDLE_TIMEOUT:
+            _close_connection()
+        connection = _connection or _open_connection()
+        sent = 0
+        index = 0
+        reconnected = False
+        while index < len(messages):
+            try:
+                sent += connection.send_messages([messages[index]]) or 0
+            except (smtplib.SMTPServerDisconnected, ConnectionError):
+                _close_connection()
+                if reconnected:
+                    raise
+                reconnected = True
+                connection = _open_connection()
+                continue
+            index += 1
+        _last_used = time.monotonic()
+        return sent
+
+
+__all__ = ['send_messages']